@@ -1,21 +1,86 @@
 import numpy as np
+import os
 import random
 import glob
 import pickle
-from math import log, ceil
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from math import ceil
 
 # ECS_MeDiv algorithm
 
-def calculate_counters(data_sets, c_threshold=None, w_factor="fraction"):
+def _signed_diff(c_total, n_fingerprints):
+    """2 * c_total - n_fingerprints, promoting narrow or unsigned integer sums to a signed type"""
+    c_total = np.asarray(c_total)
+    c_total = c_total.astype(np.result_type(c_total.dtype, np.int32), copy=False)
+    return 2 * c_total - n_fingerprints
+
+def _counters_fraction(c_total, n_fingerprints, c_threshold):
+    """Calculate the counters for the 'fraction' weight in a single sweep.
+
+    The masked reductions use the ``where`` argument of the ufuncs, so no
+    intermediate copies of the selected column sums are made. The reductions
+    run over the last axis, so c_total can also be a 2D array with one
+    column-sum vector per row.
+
+    Returns
+    -------
+    a, w_a, d, w_d, total_dis, total_w_dis
+    """
+    diff = _signed_diff(c_total, n_fingerprints)
+    a_mask = diff > c_threshold
+    d_mask = -diff > c_threshold
+    dis_mask = ~(a_mask | d_mask)
+    a = np.count_nonzero(a_mask, axis=-1)
+    d = np.count_nonzero(d_mask, axis=-1)
+    total_dis = diff.shape[-1] - a - d
+    # the division by n_fingerprints is applied to the sums, so the
+    # reductions stay in integer arithmetic for integer column sums
+    w_a = np.sum(diff, axis=-1, where=a_mask)/n_fingerprints
+    w_d = -np.sum(diff, axis=-1, where=d_mask)/n_fingerprints
+    sum_abs_dis = np.sum(np.abs(diff), axis=-1, where=dis_mask)
+    total_w_dis = total_dis - (sum_abs_dis - total_dis * (n_fingerprints % 2))/n_fingerprints
+    return a, w_a, d, w_d, total_dis, total_w_dis
+
+def _f_s_power(d, power, n_fingerprints):
+    """Similarity weight of the 'power_n' w_factor"""
+    return np.power(float(power), -(n_fingerprints - d))
+
+def _f_d_power(d, power, n_fingerprints):
+    """Dissimilarity weight of the 'power_n' w_factor"""
+    return np.power(float(power), -(d - n_fingerprints % 2))
+
+def _resolve_c_threshold(c_threshold, n_fingerprints):
+    """Turn the c_threshold argument into the value compared against the column sums"""
+    if not c_threshold or c_threshold == 'min':
+        c_threshold = n_fingerprints % 2
+    if isinstance(c_threshold, str):
+        if c_threshold != 'dissimilar':
+            raise TypeError("c_threshold must be None, 'dissimilar', or an integer.")
+        else:
+            c_threshold = ceil(n_fingerprints / 2)
+    if isinstance(c_threshold, int):
+        if c_threshold >= n_fingerprints:
+            raise ValueError("c_threshold cannot be equal or greater than n_fingerprints.")
+        c_threshold = c_threshold
+    if 0 < c_threshold < 1:
+        c_threshold *= n_fingerprints
+    return c_threshold
+
+def calculate_counters(c_total, n_fingerprints, c_threshold=None, w_factor="fraction"):
     """Calculate 1-similarity, 0-similarity, and dissimilarity counters
 
     Arguments
     ---------
-    data_sets : np.ndarray
-        Array of arrays. Each sub-array contains m + 1 elements,
-        with m being the length of the fingerprints. The first
-        m elements are the column sums of the matrix of fingerprints.
-        The last element is the number of fingerprints.
+    c_total : np.ndarray
+        Column sums of the matrix of fingerprints (m elements, with m
+        being the length of the fingerprints). A 2D array is treated as
+        one set of column sums per row, and every counter is then an
+        array with one entry per row.
+
+    n_fingerprints : int
+        Number of fingerprints in the set.
 
     c_threshold : {None, 'dissimilar', int, float}
         Coincidence threshold.
@@ -43,71 +108,48 @@ def calculate_counters(data_sets, c_threshold=None, w_factor="fraction"):
     https://jcheminf.biomedcentral.com/articles/10.1186/s13321-021-00505-3
     https://jcheminf.biomedcentral.com/articles/10.1186/s13321-021-00504-4
     """
-    # Setting matches
-    total_data = np.sum(data_sets, axis=0)
-    n_fingerprints = int(total_data[-1])
-    c_total = total_data[:-1]
-    
-    # Assign c_threshold
-    if not c_threshold or c_threshold == 'min':
-        c_threshold = n_fingerprints % 2
-    if isinstance(c_threshold, str):
-        if c_threshold != 'dissimilar':
-            raise TypeError("c_threshold must be None, 'dissimilar', or an integer.")
-        else:
-            c_threshold = ceil(n_fingerprints / 2)
-    if isinstance(c_threshold, int):
-        if c_threshold >= n_fingerprints:
-            raise ValueError("c_threshold cannot be equal or greater than n_fingerprints.")
-        c_threshold = c_threshold
-    if 0 < c_threshold < 1:
-        c_threshold *= n_fingerprints
-    
-    # Set w_factor
-    if w_factor:
-        if "power" in w_factor:
-            power = int(w_factor.split("_")[-1])
-            def f_s(d):
-                return power**-float(n_fingerprints - d)
-    
-            def f_d(d):
-                return power**-float(d - n_fingerprints % 2)
-        elif w_factor == "fraction":
-            def f_s(d):
-                return d/n_fingerprints
-    
-            def f_d(d):
-                return 1 - (d - n_fingerprints % 2)/n_fingerprints
-        else:
-            def f_s(d):
-                return 1
-    
-            def f_d(d):
-                return 1
-    else:
-        def f_s(d):
-            return 1
-    
-        def f_d(d):
-            return 1
-    
+    c_threshold = _resolve_c_threshold(c_threshold, n_fingerprints)
+    return _counters_core(c_total, n_fingerprints, c_threshold, w_factor)
+
+def _counters_core(c_total, n_fingerprints, c_threshold, w_factor="fraction"):
+    """Calculate the counters with an already resolved c_threshold"""
     # Calculate a, d, b + c
-    a = 0
-    w_a = 0
-    d = 0
-    w_d = 0
-    total_dis = 0
-    total_w_dis = 0
-    for s in c_total:
-        if 2 * s - n_fingerprints > c_threshold:
-            a += 1
-            w_a += f_s(2 * s - n_fingerprints)
-        elif n_fingerprints - 2 * s > c_threshold:
-            d += 1
-            w_d += f_s(abs(2 * s - n_fingerprints))
+    if w_factor == "fraction":
+        a, w_a, d, w_d, total_dis, total_w_dis = _counters_fraction(c_total, n_fingerprints,
+                                                                    c_threshold)
+    else:
+        diff = _signed_diff(c_total, n_fingerprints)
+        abs_diff = np.abs(diff)
+        a_mask = diff > c_threshold
+        d_mask = -diff > c_threshold
+        dis_mask = ~(a_mask | d_mask)
+        a = np.count_nonzero(a_mask, axis=-1)
+        d = np.count_nonzero(d_mask, axis=-1)
+        total_dis = np.count_nonzero(dis_mask, axis=-1)
+
+        # Set w_factor
+        if w_factor and "power" in w_factor:
+            power = int(w_factor.split("_")[-1])
+            if np.issubdtype(diff.dtype, np.integer):
+                # diff only takes the 2n + 1 integer values in [-n, n], so the
+                # weights are read from lookup tables instead of calling pow
+                k = np.arange(-n_fingerprints, n_fingerprints + 1)
+                fs_lut = _f_s_power(k, power, n_fingerprints)
+                fd_lut = _f_d_power(k, power, n_fingerprints)
+                sim_a = fs_lut[diff + n_fingerprints]
+                sim_d = fs_lut[abs_diff + n_fingerprints]
+                dis = fd_lut[abs_diff + n_fingerprints]
+            else:
+                sim_a = _f_s_power(diff, power, n_fingerprints)
+                sim_d = _f_s_power(abs_diff, power, n_fingerprints)
+                dis = _f_d_power(abs_diff, power, n_fingerprints)
+            w_a = np.sum(sim_a, axis=-1, where=a_mask)
+            w_d = np.sum(sim_d, axis=-1, where=d_mask)
+            total_w_dis = np.sum(dis, axis=-1, where=dis_mask)
         else:
-            total_dis += 1
-            total_w_dis += f_d(abs(2 * s - n_fingerprints))
+            w_a = a
+            w_d = d
+            total_w_dis = total_dis
     total_sim = a + d
     total_w_sim = w_a + w_d
     p = total_sim + total_dis
@@ -120,194 +162,178 @@ def calculate_counters(data_sets, c_threshold=None, w_factor="fraction"):
     
     return counters
     
-def gen_sim_dict(data_sets, c_threshold=None, w_factor="fraction"):
-    counters = calculate_counters(data_sets, c_threshold=c_threshold, w_factor="fraction")
-    # Indices
-    # AC: Austin-Colwell, BUB: Baroni-Urbani-Buser, CTn: Consoni-Todschini n
-    # Fai: Faith, Gle: Gleason, Ja: Jaccard, Ja0: Jaccard 0-variant
-    # JT: Jaccard-Tanimoto, RT: Rogers-Tanimoto, RR: Russel-Rao
-    # SM: Sokal-Michener, SSn: Sokal-Sneath n
-
-    # Weighted Indices
-    ac_w = (2/np.pi) * np.arcsin(np.sqrt(counters['total_w_sim']/
-                                         counters['w_p']))
-    bub_w = ((counters['w_a'] * counters['w_d'])**0.5 + counters['w_a'])/\
-            ((counters['w_a'] * counters['w_d'])**0.5 + counters['w_a'] + counters['total_w_dis'])
-    ct1_w = (log(1 + counters['w_a'] + counters['w_d']))/\
-            (log(1 + counters['w_p']))
-    ct2_w = (log(1 + counters['w_p']) - log(1 + counters['total_w_dis']))/\
-            (log(1 + counters['w_p']))
-    ct3_w = (log(1 + counters['w_a']))/\
-            (log(1 + counters['w_p']))
-    ct4_w = (log(1 + counters['w_a']))/\
-            (log(1 + counters['w_a'] + counters['total_w_dis']))
-    fai_w = (counters['w_a'] + 0.5 * counters['w_d'])/\
-            (counters['w_p'])
-    gle_w = (2 * counters['w_a'])/\
-            (2 * counters['w_a'] + counters['total_w_dis'])
-    ja_w = (3 * counters['w_a'])/\
-           (3 * counters['w_a'] + counters['total_w_dis'])
-    ja0_w = (3 * counters['total_w_sim'])/\
-            (3 * counters['total_w_sim'] + counters['total_w_dis'])
-    jt_w = (counters['w_a'])/\
-           (counters['w_a'] + counters['total_w_dis'])
-    rt_w = (counters['total_w_sim'])/\
-           (counters['w_p'] + counters['total_w_dis'])
-    rr_w = (counters['w_a'])/\
-           (counters['w_p'])
-    sm_w =(counters['total_w_sim'])/\
-          (counters['w_p'])
-    ss1_w = (counters['w_a'])/\
-            (counters['w_a'] + 2 * counters['total_w_dis'])
-    ss2_w = (2 * counters['total_w_sim'])/\
-            (counters['w_p'] + counters['total_w_sim'])
-
-
-    ## Non-Weighted Indices
-    ac_nw = (2/np.pi) * np.arcsin(np.sqrt(counters['total_w_sim']/
-                                          counters['p']))
-    bub_nw = ((counters['w_a'] * counters['w_d'])**0.5 + counters['w_a'])/\
-             ((counters['a'] * counters['d'])**0.5 + counters['a'] + counters['total_dis'])
-    ct1_nw = (log(1 + counters['w_a'] + counters['w_d']))/\
-             (log(1 + counters['p']))
-    ct2_nw = (log(1 + counters['w_p']) - log(1 + counters['total_w_dis']))/\
-             (log(1 + counters['p']))
-    ct3_nw = (log(1 + counters['w_a']))/\
-             (log(1 + counters['p']))
-    ct4_nw = (log(1 + counters['w_a']))/\
-             (log(1 + counters['a'] + counters['total_dis']))
-    fai_nw = (counters['w_a'] + 0.5 * counters['w_d'])/\
-             (counters['p'])
-    gle_nw = (2 * counters['w_a'])/\
-             (2 * counters['a'] + counters['total_dis'])
-    ja_nw = (3 * counters['w_a'])/\
-            (3 * counters['a'] + counters['total_dis'])
-    ja0_nw = (3 * counters['total_w_sim'])/\
-             (3 * counters['total_sim'] + counters['total_dis'])
-    jt_nw = (counters['w_a'])/\
-            (counters['a'] + counters['total_dis'])
-    rt_nw = (counters['total_w_sim'])/\
-            (counters['p'] + counters['total_dis'])
-    rr_nw = (counters['w_a'])/\
-            (counters['p'])
-    sm_nw =(counters['total_w_sim'])/\
-           (counters['p'])
-    ss1_nw = (counters['w_a'])/\
-             (counters['a'] + 2 * counters['total_dis'])
-    ss2_nw = (2 * counters['total_w_sim'])/\
-             (counters['p'] + counters['total_sim'])
-
-    # Dictionary with all the results
-    Indices = {'nw': {'AC':ac_nw,
-                      'BUB':bub_nw,
-                      'CT1':ct1_nw,
-                      'CT2':ct2_nw,
-                      'CT3':ct3_nw,
-                      'CT4':ct4_nw,
-                      'Fai':fai_nw,
-                      'Gle':gle_nw,
-                      'Ja0':ja0_nw,
-                      'Ja':ja_nw,
-                      'JT':jt_nw,
-                      'RT':rt_nw,
-                      'RR':rr_nw,
-                      'SM':sm_nw,
-                      'SS1':ss1_nw,
-                      'SS2':ss2_nw},
-                'w': {'AC':ac_w,
-                      'BUB':bub_w,
-                      'CT1':ct1_w,
-                      'CT2':ct2_w,
-                      'CT3':ct3_w,
-                      'CT4':ct4_w,
-                      'Fai':fai_w,
-                      'Gle':gle_w,
-                      'Ja0':ja0_w,
-                      'Ja':ja_w,
-                      'JT':jt_w,
-                      'RT':rt_w,
-                      'RR':rr_w,
-                      'SM':sm_w,
-                      'SS1':ss1_w,
-                      'SS2':ss2_w}}
+# Indices
+# AC: Austin-Colwell, BUB: Baroni-Urbani-Buser, CTn: Consoni-Todschini n
+# Fai: Faith, Gle: Gleason, Ja: Jaccard, Ja0: Jaccard 0-variant
+# JT: Jaccard-Tanimoto, RT: Rogers-Tanimoto, RR: Russel-Rao
+# SM: Sokal-Michener, SSn: Sokal-Sneath n
+# Every index is written once: the numerators always use the weighted
+# counters, while the denominators (a, d, dis, sim, p) use the weighted
+# counters for the 'w' variant and the plain ones for the 'nw' variant.
+_INDEX_FORMULAS = {
+    'AC': lambda c, a, d, dis, sim, p: (2/np.pi) * np.arcsin(np.sqrt(c['total_w_sim']/p)),
+    'BUB': lambda c, a, d, dis, sim, p: ((c['w_a'] * c['w_d'])**0.5 + c['w_a'])/
+                                        ((a * d)**0.5 + a + dis),
+    'CT1': lambda c, a, d, dis, sim, p: np.log(1 + c['w_a'] + c['w_d'])/np.log(1 + p),
+    'CT2': lambda c, a, d, dis, sim, p: (np.log(1 + c['w_p']) - np.log(1 + c['total_w_dis']))/
+                                        np.log(1 + p),
+    'CT3': lambda c, a, d, dis, sim, p: np.log(1 + c['w_a'])/np.log(1 + p),
+    'CT4': lambda c, a, d, dis, sim, p: np.log(1 + c['w_a'])/np.log(1 + a + dis),
+    'Fai': lambda c, a, d, dis, sim, p: (c['w_a'] + 0.5 * c['w_d'])/p,
+    'Gle': lambda c, a, d, dis, sim, p: (2 * c['w_a'])/(2 * a + dis),
+    'Ja': lambda c, a, d, dis, sim, p: (3 * c['w_a'])/(3 * a + dis),
+    'Ja0': lambda c, a, d, dis, sim, p: (3 * c['total_w_sim'])/(3 * sim + dis),
+    'JT': lambda c, a, d, dis, sim, p: c['w_a']/(a + dis),
+    'RT': lambda c, a, d, dis, sim, p: c['total_w_sim']/(p + dis),
+    'RR': lambda c, a, d, dis, sim, p: c['w_a']/p,
+    'SM': lambda c, a, d, dis, sim, p: c['total_w_sim']/p,
+    'SS1': lambda c, a, d, dis, sim, p: c['w_a']/(a + 2 * dis),
+    'SS2': lambda c, a, d, dis, sim, p: (2 * c['total_w_sim'])/(p + sim),
+}
+
+_DENOMINATOR_KEYS = {'w': ('w_a', 'w_d', 'total_w_dis', 'total_w_sim', 'w_p'),
+                     'nw': ('a', 'd', 'total_dis', 'total_sim', 'p')}
+
+def _index_fn(weight, n_ary, formulas=_INDEX_FORMULAS):
+    """Bind one of the index formulas to the counters of its variant"""
+    formula = formulas[n_ary]
+    keys = _DENOMINATOR_KEYS[weight]
+    return lambda c: formula(c, *(c[key] for key in keys))
+
+_INDEX_FNS = {(weight, n_ary): _index_fn(weight, n_ary)
+              for weight in ('w', 'nw') for n_ary in _INDEX_FORMULAS}
+
+# The medoid, outlier and candidate searches only compare values, so the
+# monotonic (2/pi) * arcsin(sqrt(x)) of AC is dropped there and the sets
+# are ranked on x itself. The other indices have no transcendental calls
+# that can be removed this way.
+_RANK_FORMULAS = dict(_INDEX_FORMULAS, AC=lambda c, a, d, dis, sim, p: c['total_w_sim']/p)
+
+_RANK_FNS = {(weight, n_ary): _index_fn(weight, n_ary, formulas=_RANK_FORMULAS)
+             for weight in ('w', 'nw') for n_ary in _RANK_FORMULAS}
+
+def compute_single_index(counters, n_ary='RR', weight='nw'):
+    """Calculate a single similarity index from the counters.
+
+    Arguments
+    ---------
+    counters : dict
+        Dictionary with the weighted and non-weighted counters.
+    n_ary : str
+        Abbreviation of the index (see n_arys).
+    weight : {'w', 'nw'}
+        Weighted or non-weighted variant of the index.
+
+    Returns
+    -------
+    sim_index : float
+        Value of the requested index.
+    """
+    return _INDEX_FNS[(weight, n_ary)](counters)
+
+def gen_sim_dict(c_total, n_fingerprints, c_threshold=None, w_factor="fraction"):
+    """Calculate all the similarity indices (weighted and non-weighted)"""
+    counters = calculate_counters(c_total, n_fingerprints, c_threshold=c_threshold, w_factor=w_factor)
+    Indices = {'nw': {}, 'w': {}}
+    for (weight, n_ary), index_fn in _INDEX_FNS.items():
+        Indices[weight][n_ary] = index_fn(counters)
     return Indices
 
-def calculate_medoid(total_data, n_ary = 'RR', weight = 'nw'):
-    """Calculate the medoid of a set"""
-    index = len(total_data[0]) + 1
-    min_sim = 3.08
-    total_sum = np.sum(total_data, axis = 0)
-    for i, pixel in enumerate(total_data):
-        i_sum = total_sum - total_data[i]
-        data_sets = [np.append(i_sum, len(total_data) - 1)]
-        Indices = gen_sim_dict(data_sets)
-        sim_index = Indices[weight][n_ary]
-        if sim_index < min_sim:
-            min_sim = sim_index
-            index = i
-        else:
-            pass
-    return index
+def _complementary_sims(total_data, n_ary='RR', weight='nw', chunk_size=1024, total_sum=None):
+    """Similarity of the set left after removing each object
+
+    The column sums of all the complementary sets are built as a
+    (chunk_size, m) block at a time and scored in a single vectorized pass.
+    The values are ranking keys (see _RANK_FORMULAS), not always the index itself.
+    """
+    n_objects = len(total_data)
+    if total_sum is None:
+        total_sum = np.sum(total_data, axis = 0)
+    index_fn = _RANK_FNS[(weight, n_ary)]
+    sims = np.empty(n_objects)
+    for start in range(0, n_objects, chunk_size):
+        c_totals = total_sum - total_data[start:start + chunk_size]
+        sims[start:start + len(c_totals)] = index_fn(calculate_counters(c_totals, n_objects - 1))
+    return sims
+
+def calculate_medoid(total_data, n_ary = 'RR', weight = 'nw', total_sum=None):
+    """Calculate the medoid of a set
+
+    total_sum, the column sums of total_data, can be passed to skip the
+    sweep over the data when it is already known.
+    """
+    return int(np.nanargmin(_complementary_sims(total_data, n_ary=n_ary, weight=weight,
+                                                total_sum=total_sum)))
     
-def calculate_outlier(total_data, n_ary = 'RR', weight = 'nw'):
-    """Calculate the outlier of a set"""
-    index = len(total_data[0]) + 1
-    max_sim = -3.08
-    total_sum = np.sum(total_data, axis = 0)
-    for i, pixel in enumerate(total_data):
-        i_sum = total_sum - total_data[i]
-        data_sets = [np.append(i_sum, len(total_data) - 1)]
-        Indices = gen_sim_dict(data_sets)
-        sim_index = Indices[weight][n_ary]
-        if sim_index > max_sim:
-            max_sim = sim_index
-            index = i
-        else:
-            pass
-    return index
+def calculate_outlier(total_data, n_ary = 'RR', weight = 'nw', total_sum=None):
+    """Calculate the outlier of a set (see calculate_medoid for total_sum)"""
+    return int(np.nanargmax(_complementary_sims(total_data, n_ary=n_ary, weight=weight,
+                                                total_sum=total_sum)))
 
 def get_single_index(total_data, indices, selected_n, c_threshold=None, n_ary = 'RR', weight = 'nw'):
     """Binary tie-breaker selection criterion"""
     index = len(total_data[0]) + 1
     min_value = 3.08
+    index_fn = _INDEX_FNS[(weight, n_ary)]
+    c_threshold = _resolve_c_threshold(c_threshold, 2)
+    selected_data = total_data[selected_n]
     for i in indices:
-        v = 0
-        for j in selected_n:
-            c_total = total_data[j] + total_data[i]
-            data_sets = [np.append(c_total, 2)]
-            Indices = gen_sim_dict(data_sets, c_threshold=c_threshold)
-            sim_index = Indices[weight][n_ary]
-            v += sim_index
+        # binary comparisons of i with all the selected objects at once
+        c_totals = selected_data + total_data[i]
+        v = np.sum(index_fn(_counters_core(c_totals, 2, c_threshold)))
         av_v = v/(len(selected_n) + 1)
         if av_v < min_value:
             index = i
             min_value = av_v
     return index
 
-def get_new_index_n(total_data, selected_condensed, n, select_from_n, selected_n, c_threshold=None,
-                    n_ary = 'RR', weight = 'nw'):
-    """Select a diverse object using the ECS_MeDiv algorithm"""
+def score_candidate(selected_condensed, fp_i, n_total, c_threshold, index_fn):
+    """Similarity of the selected set after adding the candidate fingerprint(s) fp_i
+
+    fp_i can be a single fingerprint or a (k, m) block of candidates, in
+    which case one score per row is returned.
+    """
+    c_total = selected_condensed + fp_i
+    return index_fn(_counters_core(c_total, n_total, c_threshold))
+
+def get_new_index_n(total_data, selected_condensed, n, alive, selected_n, c_threshold=None,
+                    n_ary = 'RR', weight = 'nw', chunk_size=1024, n_jobs=1):
+    """Select a diverse object using the ECS_MeDiv algorithm
+
+    The candidates are scored in blocks of chunk_size rows; with n_jobs > 1
+    the blocks are spread over a pool of threads (NumPy releases the GIL
+    inside the reductions).
+    """
     n_total = n + 1
     # min value that is guaranteed to be higher than all the comparisons
     min_value = 3.08
     
-    # placeholder index
-    indices = [len(total_data[0]) + 1]
+    # only the requested index is evaluated for the candidates,
+    # with the threshold resolved once for the whole step
+    index_fn = _RANK_FNS[(weight, n_ary)]
+    c_threshold = _resolve_c_threshold(c_threshold, n_total)
     
-    # for all indices that have not been selected
-    for i in select_from_n:
-        # column sum
-        c_total = selected_condensed + total_data[i]
-        # calculating similarity
-        data_sets = [np.append(c_total, n_total)]
-        Indices = gen_sim_dict(data_sets, c_threshold=c_threshold)
-        sim_index = Indices[weight][n_ary]
-        # if the sim of the set is less than the similarity of the previous diverse set, update min_value and index
-        if sim_index < min_value:
-            indices = [i]
-            min_value = sim_index
-        elif sim_index == min_value:
-            indices.append(i)
+    # scoring all the indices that have not been selected, a block at a time
+    candidates = np.flatnonzero(alive)
+    sims = np.empty(len(candidates))
+    def score_block(start):
+        block = candidates[start:start + chunk_size]
+        sims[start:start + len(block)] = score_candidate(selected_condensed, total_data[block],
+                                                         n_total, c_threshold, index_fn)
+    starts = range(0, len(candidates), chunk_size)
+    if n_jobs > 1 and len(starts) > 1:
+        with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+            list(executor.map(score_block, starts))
+    else:
+        for start in starts:
+            score_block(start)
+    
+    # candidates with the minimum similarity (NaN never compares below min_value)
+    valid = sims < min_value
+    if not np.any(valid):
+        # placeholder index
+        return len(total_data[0]) + 1
+    indices = candidates[sims == np.min(sims[valid])]
     if len(indices) == 1:
         index = indices[0]
     else:
@@ -319,10 +345,11 @@ def get_new_index_n(total_data, selected_condensed, n, select_from_n, selected_n
 n_arys = ['AC', 'BUB', 'CT1', 'CT2', 'CT3', 'CT4', 'Fai',
           'Gle', 'Ja', 'Ja0', 'JT', 'RT', 'RR', 'SM', 'SS1', 'SS2']
 
-for n_ary in n_arys:
-    DiversityDict = {}
+def run_one(n_ary, files):
+    """Run the ECS_MeDiv selection with one index on all the files"""
+    DiversityDict = defaultdict(dict)
     for c_threshold in ['min']:
-        for file in glob.glob('*.npy'):
+        for file in files:
             if 'rank' in file:
                 pass
             else:
@@ -332,38 +359,46 @@ for n_ary in n_arys:
                 # random = select random initial seed
                 # out = start from outlier
                 start = 'medoid'
-                # Numpy array with the data
-                total_data = np.load(file)
+                # Numpy array with the data, memory-mapped so that the
+                # workers of the different indices share the page cache
+                total_data = np.load(file, mmap_mode='r')
                 total_n = []
                 
                 # total number of fingerprints
                 fp_total = len(total_data)
                 
-                # indices of all the fingerprints
-                total_indices = np.array(range(fp_total))
+                # column sums are accumulated in at least int32, so narrow
+                # integer data (e.g. uint8 fingerprints) cannot overflow,
+                # while float data keep their own dtype
+                acc_dtype = np.result_type(total_data.dtype, np.int32)
+                
+                # column sums of the whole set, shared by the seed calculations
+                total_sum = np.sum(total_data, axis = 0, dtype = acc_dtype)
                 
                 # starting point
                 if start =='medoid':
-                    seed = calculate_medoid(total_data, n_ary = n_ary)
+                    seed = calculate_medoid(total_data, n_ary = n_ary, total_sum = total_sum)
                 elif start == 'random':
                     seed = random.randint(0, fp_total - 1)
                 elif start == 'out':
-                    seed = calculate_outlier(total_data, n_ary = n_ary)
+                    seed = calculate_outlier(total_data, n_ary = n_ary, total_sum = total_sum)
                 else:
                     print('Select a correct starting point')
                 selected_n = [seed]
                 
+                # mask of the fingerprints that can still be selected
+                alive = np.ones(fp_total, dtype=bool)
+                alive[seed] = False
+                
                 # vector with the column sums of all the selected fingerprints
-                selected_condensed = total_data[seed]
+                # (a copy, so the updates do not write into total_data)
+                selected_condensed = np.array(total_data[seed], dtype = acc_dtype)
                 
                 # number of fingerprints selected
                 n = 1
                 while len(selected_n) < 10:
-                    # indices from which to select the new fingerprints
-                    select_from_n = np.delete(total_indices, selected_n)
-                    
                     # new index selected
-                    new_index_n = get_new_index_n(total_data, selected_condensed, n, select_from_n, selected_n,
+                    new_index_n = get_new_index_n(total_data, selected_condensed, n, alive, selected_n,
                                                   c_threshold=c_threshold, n_ary = n_ary)
                     
                     # updating column sum vector
@@ -371,11 +406,22 @@ for n_ary in n_arys:
                     
                     # updating selected indices
                     selected_n.append(new_index_n)
+                    alive[new_index_n] = False
                     
                     # updating n
                     n = len(selected_n)
                     print(selected_n)
                 DiversityDict[c_threshold][base_name] = selected_n
-    f = open(n_ary + '_' + start + '_' + base_name + '_.pkl', 'wb')
-    pickle.dump(DiversityDict, f)
-    f.close()
+                
+                # saving the selections of this file as soon as they are done
+                file_results = {c: {base_name: results[base_name]} for c, results in DiversityDict.items()
+                                if base_name in results}
+                with open(n_ary + '_' + start + '_' + base_name + '_.pkl', 'wb') as f:
+                    pickle.dump(file_results, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+if __name__ == '__main__':
+    files = glob.glob('*.npy')
+    # the runs with different indices are independent
+    with ProcessPoolExecutor(max_workers=min(len(n_arys), os.cpu_count() or 1)) as executor:
+        list(executor.map(partial(run_one, files=files), n_arys))
@@ -38,8 +38,11 @@ def calculate_counters(data_sets, c_threshold=None, w_factor="fraction"):
     https://jcheminf.biomedcentral.com/articles/10.1186/s13321-021-00505-3
     https://jcheminf.biomedcentral.com/articles/10.1186/s13321-021-00504-4
     """
-    # Setting matches
-    total_data = np.sum(data_sets, axis=0)
+    # Setting matches (a single row is already its own column sum)
+    if len(data_sets) == 1:
+        total_data = np.asarray(data_sets[0])
+    else:
+        total_data = np.sum(data_sets, axis=0)
     n_fingerprints = int(total_data[-1])
     c_total = total_data[:-1]
     
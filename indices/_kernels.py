@@ -0,0 +1,275 @@
+"""Array kernels shared by the counter setters of BaseComparisons.
+
+Every kernel works on the (n_fingerprints + 1)-long vectors indexed by the
+number of 1s, k, in a column, so the same function serves the weighted and
+the unweighted counters.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+
+
+def binomial_row(n):
+    """Exact binomial coefficients C(n, k) for k = 0, ..., n.
+
+    Uses the recurrence C(n, k + 1) = C(n, k) * (n - k) // (k + 1) up to
+    n // 2 and mirrors the rest with C(n, k) = C(n, n - k).
+    """
+    row = (n + 1) * [1]
+    c = 1
+    for k in range(n // 2):
+        c = c * (n - k) // (k + 1)
+        row[k + 1] = row[n - k - 1] = c
+    return row
+
+
+def pair_matches(fingerprints):
+    """Matches of exactly two binary fingerprints from bitwise operations.
+
+    For a pair, the columns with two 1s are x & y and the columns with one
+    1 are x ^ y, so the matches come from two byte-wise reductions
+    instead of a column sum and a bincount.
+    """
+    x, y = fingerprints
+    n_and = np.count_nonzero(x & y)
+    n_xor = np.count_nonzero(x ^ y)
+    return np.array([len(x) - n_and - n_xor, n_xor, n_and], dtype=np.int32)
+
+
+def all_pair_matches(fingerprints):
+    """Matches of every pair of a set of binary fingerprints.
+
+    The columns with two 1s of all the pairs come from one matrix product,
+    and the columns with one 1 from the row sums: x ^ y = |x| + |y| - 2|x & y|.
+
+    Returns
+    -------
+    matches : np.ndarray
+        int64 array of shape (C(len(fingerprints), 2), 3), one row per pair
+        (i, j), i < j, in the order of itertools.combinations.
+    """
+    # float64 products are exact for counts below 2**53
+    fingerprints = np.asarray(fingerprints, dtype=np.float64)
+    i, j = np.triu_indices(len(fingerprints), k=1)
+    n_and = np.rint(fingerprints @ fingerprints.T)[i, j].astype(np.int64)
+    row_sums = np.rint(fingerprints.sum(axis=1)).astype(np.int64)
+    n_xor = row_sums[i] + row_sums[j] - 2 * n_and
+    return np.column_stack((fingerprints.shape[1] - n_and - n_xor, n_xor, n_and))
+
+
+def combination_matches(fingerprints, combinations):
+    """Matches of many sets of binary fingerprints taken from one matrix.
+
+    Parameters
+    ----------
+    fingerprints : np.ndarray
+        uint8 matrix with all the fingerprints.
+    combinations : np.ndarray
+        Integer array of shape (n_sets, n), rows of fingerprints of each set.
+
+    Returns
+    -------
+    matches : np.ndarray
+        int64 array of shape (n_sets, n + 1), the matches of every set.
+
+    Notes
+    -----
+    The column sums of a block of sets are reduced in one call, and the
+    matches of the whole block come from a single bincount with the column
+    sums of set b shifted by b * (n + 1).
+    """
+    n_sets, n = combinations.shape
+    acc_dtype = np.uint8 if n < 256 else np.int32
+    # blocks of about 4 MB of gathered fingerprints
+    block_size = max(1, 2**22 // max(1, n * fingerprints.shape[1]))
+    matches = np.empty((n_sets, n + 1), dtype=np.int64)
+    for start in range(0, n_sets, block_size):
+        block = combinations[start:start + block_size]
+        c_totals = np.sum(fingerprints[block], axis=1, dtype=acc_dtype).astype(np.intp)
+        c_totals += (n + 1) * np.arange(len(block), dtype=np.intp)[:, None]
+        matches[start:start + len(block)] = np.bincount(
+            c_totals.ravel(), minlength=len(block) * (n + 1)).reshape(len(block), n + 1)
+    return matches
+
+
+# Number of 1s of every byte, for NumPy versions without np.bitwise_count
+_POPCOUNT = np.array([bin(byte).count("1") for byte in range(256)], dtype=np.uint8)
+
+
+def _popcount_sum(packed):
+    """Total number of 1 bits of a uint8 array."""
+    if hasattr(np, "bitwise_count"):
+        return int(np.bitwise_count(packed).sum(dtype=np.int64))
+    return int(_POPCOUNT.take(packed).sum(dtype=np.int64))
+
+
+def packed_pair_matches(packed, n_bits):
+    """Matches of two fingerprints packed with np.packbits (see pair_matches).
+
+    The padding bits of the last byte are 0 in both fingerprints, so they
+    add nothing to x & y or x ^ y.
+    """
+    x, y = packed
+    n_and = _popcount_sum(x & y)
+    n_xor = _popcount_sum(x ^ y)
+    return np.array([n_bits - n_and - n_xor, n_xor, n_and], dtype=np.int32)
+
+
+def packed_column_sums(packed, n_bits, block_size=255):
+    """Column sums of fingerprints packed with np.packbits along the bits.
+
+    Only one block of block_size rows is unpacked at a time, so the full
+    0/1 matrix, 8 times larger than the packed one, is never built.
+    """
+    acc_dtype = np.uint16 if len(packed) < 2**16 else np.int32
+    c_total = np.zeros(n_bits, dtype=acc_dtype)
+    for start in range(0, len(packed), block_size):
+        block = np.unpackbits(packed[start:start + block_size], axis=1, count=n_bits)
+        c_total += np.sum(block, axis=0, dtype=np.uint8)
+    return c_total
+
+
+# Matrices with at least this many entries have their column sums split
+# over N_THREADS threads (NumPy releases the GIL inside the reductions)
+PARALLEL_MIN_SIZE = 2**26
+N_THREADS = os.cpu_count() or 1
+
+
+def column_sums(fingerprints, block_size=255):
+    """Column sums of a matrix of binary uint8 fingerprints.
+
+    Blocks of up to 255 rows are reduced with a uint8 accumulator, which
+    cannot overflow for 0/1 entries, and the block sums are flushed into
+    the final accumulator (uint16 for fewer than 2**16 rows, else int32).
+    This keeps most of the reduction at one byte per bit. Large matrices
+    (see PARALLEL_MIN_SIZE) are reduced by row ranges on a thread pool.
+    """
+    n_rows = len(fingerprints)
+    acc_dtype = np.uint16 if n_rows < 2**16 else np.int32
+    n_threads = min(N_THREADS, -(-n_rows // block_size))
+    if fingerprints.size < PARALLEL_MIN_SIZE or n_threads < 2:
+        return _column_sums_serial(fingerprints, acc_dtype, block_size)
+    # row ranges made of whole blocks
+    rows_per_thread = -(-n_rows // (n_threads * block_size)) * block_size
+    starts = range(0, n_rows, rows_per_thread)
+    with ThreadPoolExecutor(max_workers=n_threads) as executor:
+        partial_sums = executor.map(lambda start: _column_sums_serial(
+            fingerprints[start:start + rows_per_thread], acc_dtype, block_size), starts)
+        c_total = np.zeros(fingerprints.shape[1], dtype=acc_dtype)
+        for partial_sum in partial_sums:
+            c_total += partial_sum
+    return c_total
+
+
+def _column_sums_serial(fingerprints, acc_dtype, block_size):
+    """Column sums of fingerprints, in uint8 blocks of block_size rows."""
+    if len(fingerprints) <= block_size:
+        return np.sum(fingerprints, axis=0, dtype=np.uint8).astype(acc_dtype)
+    c_total = np.zeros(fingerprints.shape[1], dtype=acc_dtype)
+    for start in range(0, len(fingerprints), block_size):
+        c_total += np.sum(fingerprints[start:start + block_size], axis=0, dtype=np.uint8)
+    return c_total
+
+
+def coincidence_masks(n_fingerprints, c_threshold):
+    """Masks over k of the 1-similarity, 0-similarity and dissimilarity levels.
+
+    Returns
+    -------
+    a_mask, d_mask, dis_mask : np.ndarray
+        Boolean arrays with 2k - n_fingerprints > c_threshold,
+        n_fingerprints - 2k > c_threshold and |2k - n_fingerprints| <= c_threshold.
+    """
+    diff = 2 * np.arange(n_fingerprints + 1, dtype=np.int32) - n_fingerprints
+    a_mask = diff > c_threshold
+    d_mask = -diff > c_threshold
+    dis_mask = np.abs(diff) <= c_threshold
+    return a_mask, d_mask, dis_mask
+
+
+def d_vector(n_fingerprints):
+    """The numbers |2k - n_fingerprints| for k = 0, ..., n_fingerprints."""
+    return np.abs(2 * np.arange(n_fingerprints + 1, dtype=np.int32) - n_fingerprints)
+
+
+def coincidence_weights(d, n_fingerprints, c_threshold, w_factor):
+    """Weight of every coincidence level (see BaseComparisons.set_w_factor)."""
+    sim_mask = d > c_threshold
+    if w_factor and "power" in w_factor:
+        power = w_factor.split("_")[-1]
+        if not power.isdigit():
+            raise ValueError("The power weight must be given as 'power_<int>', e.g. 'power_3'.")
+        power = float(power)
+        sim = power**-(n_fingerprints - d).astype(float)
+        dis = power**-(d - n_fingerprints % 2).astype(float)
+        return np.where(sim_mask, sim, dis)
+    elif w_factor == "fraction":
+        sim = d/n_fingerprints
+        dis = 1 - (d - n_fingerprints % 2)/n_fingerprints
+        return np.where(sim_mask, sim, dis)
+    else:
+        return np.ones(n_fingerprints + 1, dtype=int)
+
+
+@lru_cache(maxsize=128)
+def precomputed(n_fingerprints, c_threshold, w_factor):
+    """d vector, weights and masks, which only depend on (n_fingerprints, c_threshold, w_factor).
+
+    The arrays are shared between all the objects with the same arguments,
+    so they are returned read-only.
+
+    Returns
+    -------
+    d_vector, weights, a_mask, d_mask, dis_mask, dis_index, level_matrix : np.ndarray
+        dis_index holds the positions of dis_mask, which gather the
+        dissimilarity counters faster than the boolean mask.
+        level_matrix stacks the three masks as int64 rows, so that
+        level_matrix @ matches gives a, d and total_dis in one product.
+    """
+    d = d_vector(n_fingerprints)
+    masks = coincidence_masks(n_fingerprints, c_threshold)
+    arrays = (d, coincidence_weights(d, n_fingerprints, c_threshold, w_factor),
+              *masks, np.flatnonzero(masks[2]), np.stack(masks).astype(np.int64))
+    for array in arrays:
+        array.flags.writeable = False
+    return arrays
+
+
+def safe_divide(numerator, denominator):
+    """numerator/denominator, taken as 0 where the denominator is 0.
+
+    A zero denominator means that there is nothing to compare (e.g. all the
+    columns are dissimilar and the index has no similarity counters), and
+    returning 0 keeps NaN and inf out of the results.
+    """
+    if np.ndim(numerator) == 0 and np.ndim(denominator) == 0:
+        return numerator/denominator if denominator else 0.0
+    numerator, denominator = np.broadcast_arrays(numerator, denominator)
+    return np.divide(numerator, denominator, out=np.zeros(numerator.shape), where=denominator != 0)
+
+
+def jaccard_indices(total_w_sim, w_a, total_w_dis, total_sim, total_dis, a):
+    """Ja_sim_wdis, Ja_1sim_wdis, Ja_sim_dis and Ja_1sim_dis from the counters.
+
+    The counters can be scalars or arrays with one entry per set of
+    fingerprints, so the same function serves one object and many sets.
+    Zero denominators give 0 (see safe_divide).
+    """
+    three_w_sim = 3 * total_w_sim
+    three_w_a = 3 * w_a
+    return (safe_divide(three_w_sim, three_w_sim + total_w_dis),
+            safe_divide(three_w_a, three_w_a + total_w_dis),
+            safe_divide(three_w_sim, 3 * total_sim + total_dis),
+            safe_divide(three_w_a, 3 * a + total_dis))
+
+
+def jaccard_tanimoto_indices(w_a, total_w_dis, a, total_dis):
+    """JT_1sim_wdis and JT_1sim_dis from the counters (see jaccard_indices)."""
+    return safe_divide(w_a, w_a + total_w_dis), safe_divide(w_a, a + total_dis)
+
+
+def russell_rao_indices(w_a, w_p, p):
+    """RR_1sim_wdis and RR_1sim_dis from the counters (see jaccard_indices)."""
+    return safe_divide(w_a, w_p), safe_divide(w_a, p)
@@ -23,7 +23,7 @@ class AustinColwell(BaseComparisons):
 
     Methods
     -------
-    __init__(self, fingerprints, c_threshold=None, w_factor="fraction")
+    __init__(self, fingerprints=None, c_threshold=None, w_factor="fraction", comparisons=None)
         Initialize the object.
     assign_fingerprints(fingerprints)
         Assign fingerprints.
@@ -67,7 +67,7 @@ class AustinColwell(BaseComparisons):
          Calculate the index with 1-sim-counters and with unweighted denominator.
     """
 
-    def __init__(self, fingerprints, c_threshold=None, w_factor="fraction"):
+    def __init__(self, fingerprints=None, c_threshold=None, w_factor="fraction", comparisons=None):
         """Initialize the object.
 
         Parameters
@@ -79,8 +79,12 @@ class AustinColwell(BaseComparisons):
             Coincidence threshold.
         w_factor : {"fraction", "power_n"}
             Type of weight function that will be used.
+        comparisons : BaseComparisons, optional
+            Object already built for the same fingerprints, c_threshold
+            and w_factor. Its counters are reused instead of recomputed
+            and the other arguments are ignored.
         """
-        super().__init__(fingerprints, c_threshold, w_factor)
+        super().__init__(fingerprints, c_threshold, w_factor, comparisons)
         self.ac_1sim_wdis()
         self.ac_1sim_dis()
 
@@ -1,6 +1,8 @@
 import numpy as np
-from math import ceil
-from scipy.special import binom
+from math import ceil, log1p
+from indices._kernels import (binomial_row, coincidence_masks, coincidence_weights,
+                              column_sums, d_vector, packed_column_sums, packed_pair_matches,
+                              pair_matches, precomputed)
 
 
 class BaseComparisons(object):
@@ -23,8 +25,12 @@ class BaseComparisons(object):
 
     Methods
     -------
-    __init__(self, fingerprints, c_threshold=None, w_factor="fraction")
+    __init__(self, fingerprints=None, c_threshold=None, w_factor="fraction", comparisons=None)
         Initialize the object.
+    from_matches(matches, n_fingerprints, c_threshold=None, w_factor="fraction")
+        Build the object from already calculated matches.
+    from_packed(packed, n_bits, c_threshold=None, w_factor="fraction")
+        Build the object from fingerprints packed 8 bits per byte.
     assign_fingerprints(fingerprints)
         Assign fingerprints.
     assign_c_threshold(c_threshold)
@@ -33,6 +39,8 @@ class BaseComparisons(object):
         Calculate the matches between the fingerprints.
     set_d_vector()
         Calculate the d vector.
+    set_masks()
+        Calculate the masks of the similarity and dissimilarity levels.
     set_w_factor(w_factor)
         Calculate weight factors.
     set_weighted_matches()
@@ -63,7 +71,7 @@ class BaseComparisons(object):
         Calculate weighted p.
     """
 
-    def __init__(self, fingerprints, c_threshold=None, w_factor="fraction"):
+    def __init__(self, fingerprints=None, c_threshold=None, w_factor="fraction", comparisons=None):
         """Initialize the object.
 
         Parameters
@@ -77,25 +85,114 @@ class BaseComparisons(object):
             Coincidence threshold.
         w_factor : {"fraction", "power_n"}
             Type of weight function that will be used.
+        comparisons : BaseComparisons, optional
+            Object already built for the same fingerprints, c_threshold
+            and w_factor. Its counters are reused instead of recomputed
+            and the other arguments are ignored.
         """
+        if comparisons is not None:
+            self.__dict__.update(comparisons.__dict__)
+            # the weighted matches buffer stays owned by comparisons
+            self.__dict__.pop('_wm_buffer', None)
+            return
         self.assign_fingerprints(fingerprints)
         self.assign_c_threshold(c_threshold)
         self.set_matches()
-        self.set_d_vector()
-        self.set_w_factor(w_factor)
-        self.set_weighted_matches()
-        self.set_a()
-        self.set_d()
-        self.set_weighted_a()
-        self.set_weighted_d()
-        self.set_dis_counters()
-        self.set_weighted_dis_counters()
-        self.set_total_sim_counter()
-        self.set_total_weighted_sim_counter()
-        self.total_dis_counters()
-        self.total_weighted_dis_counters()
-        self.set_p()
-        self.set_weighted_p()
+        self._set_counters(w_factor)
+
+    @classmethod
+    def from_matches(cls, matches, n_fingerprints, c_threshold=None, w_factor="fraction"):
+        """Build the object from already calculated matches.
+
+        Parameters
+        ----------
+        matches : np.ndarray
+            Number of columns with k 1s, for k = 0, ..., n_fingerprints.
+        n_fingerprints : int
+            Number of fingerprints that were compared. It is stored as
+            the fingerprints attribute.
+        c_threshold : {None, 'dissimilar', int}
+            Coincidence threshold.
+        w_factor : {"fraction", "power_n"}
+            Type of weight function that will be used.
+
+        Returns
+        -------
+        comparisons : BaseComparisons
+            Object with all the counters, which can be passed as
+            comparisons to the index classes.
+        """
+        comparisons = cls.__new__(cls)
+        comparisons.assign_fingerprints(n_fingerprints)
+        comparisons.assign_c_threshold(c_threshold)
+        comparisons.matches = np.asarray(matches)
+        comparisons._set_counters(w_factor)
+        return comparisons
+
+    @classmethod
+    def from_packed(cls, packed, n_bits, c_threshold=None, w_factor="fraction"):
+        """Build the object from fingerprints packed 8 bits per byte.
+
+        Parameters
+        ----------
+        packed : np.ndarray
+            uint8 matrix of shape (n_fingerprints, ceil(n_bits / 8)), as given
+            by np.packbits(fingerprints, axis=1). It is stored as the
+            fingerprints attribute.
+        n_bits : int
+            Length of the fingerprints.
+        c_threshold : {None, 'dissimilar', int}
+            Coincidence threshold.
+        w_factor : {"fraction", "power_n"}
+            Type of weight function that will be used.
+
+        Raises
+        ------
+        TypeError
+            If packed is not a 2D uint8 numpy array.
+        ValueError
+            If less than two fingerprints are provided.
+            If n_bits does not fit in the packed rows.
+
+        Returns
+        -------
+        comparisons : BaseComparisons
+            Object with all the counters, which can be passed as
+            comparisons to the index classes.
+
+        Notes
+        -----
+        The fingerprints take 8 times less memory than the 0/1 matrix used by
+        __init__. Pairs are counted with popcounts of the packed bytes, which
+        is faster for long fingerprints; larger sets are unpacked block by
+        block, which is somewhat slower than summing the 0/1 matrix.
+        """
+        if not isinstance(packed, np.ndarray) or packed.ndim != 2 or packed.dtype != np.uint8:
+            raise TypeError("packed must be a 2D uint8 numpy array.")
+        if len(packed) < 2:
+            raise ValueError("A minimum of 2 fingerprints must be provided.")
+        if not 8 * (packed.shape[1] - 1) < n_bits <= 8 * packed.shape[1]:
+            raise ValueError("n_bits does not match the length of the packed fingerprints.")
+        comparisons = cls.__new__(cls)
+        comparisons.fingerprints = np.ascontiguousarray(packed)
+        comparisons.assign_c_threshold(c_threshold)
+        if len(packed) == 2:
+            comparisons.matches = packed_pair_matches(comparisons.fingerprints, n_bits)
+        else:
+            c_total = packed_column_sums(comparisons.fingerprints, n_bits)
+            comparisons.matches = np.bincount(c_total, minlength=len(packed) + 1).astype(np.int32)
+        comparisons._set_counters(w_factor)
+        return comparisons
+
+    def _set_counters(self, w_factor):
+        """Calculate weights, masks and counters once the matches are known."""
+        # d_vector, weights and masks are shared by all the objects with the
+        # same n_fingerprints, c_threshold and w_factor
+        (self.d_vector, self.weights,
+         self.a_mask, self.d_mask, self.dis_mask,
+         self.dis_index, self.level_matrix) = precomputed(self.n_fingerprints,
+                                                          self.c_threshold, w_factor)
+        self._build_all()
 
     @property
     def n_fingerprints(self):
@@ -143,13 +240,17 @@ class BaseComparisons(object):
         else:
             if not isinstance(fingerprints, np.ndarray):
                 raise TypeError("Fingerprints must be a numpy array or an int.")
-            if not all(isinstance(fingerprint, np.ndarray) for fingerprint in fingerprints):
-                raise TypeError("The elements of fingerprints must be a numpy array.")
+            # a 2D numeric array is a list of equal-length arrays by construction,
+            # only object arrays need the row by row checks
+            if fingerprints.ndim != 2 or fingerprints.dtype == object:
+                if not all(isinstance(fingerprint, np.ndarray) for fingerprint in fingerprints):
+                    raise TypeError("The elements of fingerprints must be a numpy array.")
+                if not all([len(fingerprint) == len(fingerprints[0]) for fingerprint in fingerprints]):
+                    raise ValueError("All the fingerprints must have the same length.")
             if len(fingerprints) < 2:
                 raise ValueError("A minimum of 2 fingerprints must be provided.")
-            if not all([len(fingerprint) == len(fingerprints[0]) for fingerprint in fingerprints]):
-                raise ValueError("All the fingerprints must have the same length.")
-            self.fingerprints = fingerprints
+            # binary fingerprints are stored once as a contiguous uint8 matrix
+            self.fingerprints = np.ascontiguousarray(fingerprints, dtype=np.uint8)
 
     def assign_c_threshold(self, c_threshold):
         """Assign coincidence threshold.
@@ -184,12 +285,12 @@ class BaseComparisons(object):
     def set_matches(self):
         """Calculate the matches between the fingerprints."""
         if isinstance(self.fingerprints, int):
-            matches = [int(binom(self.n_fingerprints, k)) for k in range(self.n_fingerprints + 1)]
+            matches = binomial_row(self.n_fingerprints)
+        elif self.n_fingerprints == 2:
+            matches = pair_matches(self.fingerprints)
         else:
-            c_total = np.sum(self.fingerprints, axis=0)
-            matches = (self.n_fingerprints + 1) * [0]
-            for i in range(self.n_fingerprints + 1):
-                matches[i] = np.count_nonzero(c_total == i)
+            c_total = column_sums(self.fingerprints)
+            matches = np.bincount(c_total, minlength=self.n_fingerprints + 1).astype(np.int32)
         self.matches = np.array(matches)
 
     def set_d_vector(self):
@@ -200,8 +301,20 @@ class BaseComparisons(object):
         The entries of this vector are the numbers |2k - n_fingerprints|,
         which measure the degree of coincidence between the given fingerprints.
         """
-        self.d_vector = np.array([abs(2 * k - self.n_fingerprints) for k in range(
-                                 self.n_fingerprints + 1)])
+        self.d_vector = d_vector(self.n_fingerprints)
+
+    def set_masks(self):
+        """Calculate the masks of the similarity and dissimilarity levels.
+
+        Notes
+        -----
+        The masks are computed once and shared by the weighted and
+        unweighted counters.
+        """
+        self.a_mask, self.d_mask, self.dis_mask = coincidence_masks(self.n_fingerprints,
+                                                                    self.c_threshold)
+        self.dis_index = np.flatnonzero(self.dis_mask)
+        self.level_matrix = np.stack([self.a_mask, self.d_mask, self.dis_mask]).astype(np.int64)
 
     def set_w_factor(self, w_factor):
         """Calculate weight factors.
@@ -214,93 +327,89 @@ class BaseComparisons(object):
                          dissimilarity = 1 - (d[k] - n_fingerprints % 2)/n_fingerprints
             'power_n' : similarity = n**-(n_fingerprints - d[k])
                         dissimilarity = n**-(d[k] - n_fingerprints % 2)
+                        with n a positive integer, e.g. 'power_3'
             other values : similarity = dissimilarity = 1
+
+        Raises
+        ------
+        ValueError
+            If the power of 'power_n' is not an integer.
+
+        Notes
+        -----
+        The weights only depend on (n_fingerprints, c_threshold, w_factor).
+        __init__ takes them from the cache of indices._kernels.precomputed,
+        so the weight function is chosen once per combination, not per object,
+        and the counters themselves never branch on w_factor.
         """
-        if w_factor:
-            if "power" in w_factor:
-                power = int(w_factor.split("_")[-1])
-                def f_s(d):
-                    return power**-float(self.n_fingerprints - d)
-    
-                def f_d(d):
-                    return power**-float(d - self.n_fingerprints % 2)
-            elif w_factor == "fraction":
-                def f_s(d):
-                    return d/self.n_fingerprints
-    
-                def f_d(d):
-                    return 1 - (d - self.n_fingerprints % 2)/self.n_fingerprints
-            else:
-                def f_s(d):
-                    return 1
-    
-                def f_d(d):
-                    return 1
-        else:
-            def f_s(d):
-                return 1
-    
-            def f_d(d):
-                return 1
-        weights = (self.n_fingerprints + 1) * [0]
-        for k in range(self.n_fingerprints + 1):
-            if self.d_vector[k] > self.c_threshold:
-                weights[k] = f_s(self.d_vector[k])
-            else:
-                weights[k] = f_d(self.d_vector[k])
-        self.weights = np.array(weights)
+        self.weights = coincidence_weights(self.d_vector, self.n_fingerprints,
+                                           self.c_threshold, w_factor)
+
+    def _build_all(self):
+        """Calculate the weighted matches and all the counters in one pass.
+
+        Notes
+        -----
+        Equivalent to calling set_weighted_matches, set_a, set_d, set_weighted_a,
+        set_weighted_d, set_dis_counters, set_weighted_dis_counters and the
+        totals/p setters in sequence. It also stores log1p(p), log1p(w_p),
+        min(a, d) and min(w_a, w_d), which are used by several indices.
+        """
+        matches = self.matches
+        self.set_weighted_matches()
+        weighted_matches = self.weighted_matches
+        # a, d and total_dis (and their weighted versions) in one product each
+        self.a, self.d, self.total_dis = np.dot(self.level_matrix, matches)
+        self.w_a, self.w_d, self.total_w_dis = np.dot(self.level_matrix, weighted_matches)
+        self.dis_counters = matches.take(self.dis_index)
+        self.w_dis_counters = weighted_matches.take(self.dis_index)
+        self.total_sim = self.a + self.d
+        self.total_w_sim = self.w_a + self.w_d
+        self.p = self.total_sim + self.total_dis
+        self.w_p = self.total_w_sim + self.total_w_dis
+        # terms shared by several indices
+        self.log1p_p = log1p(self.p)
+        self.log1p_w_p = log1p(self.w_p)
+        self.min_a_d = min(self.a, self.d)
+        self.min_wa_wd = min(self.w_a, self.w_d)
 
     def set_weighted_matches(self):
-        """Calculate weighted matches."""
-        self.weighted_matches = self.matches * self.weights
+        """Calculate weighted matches.
+
+        Notes
+        -----
+        The product is written into a buffer owned by the object, which is
+        reused when the weighted matches are recalculated.
+        """
+        dtype = np.result_type(self.matches, self.weights)
+        buffer = self.__dict__.get('_wm_buffer')
+        if buffer is None or buffer.shape != self.matches.shape or buffer.dtype != dtype:
+            buffer = self._wm_buffer = np.empty(self.matches.shape, dtype=dtype)
+        self.weighted_matches = np.multiply(self.matches, self.weights, out=buffer)
 
     def set_a(self):
         """Calculate the (unweighted) 1-similarity counter."""
-        a = 0
-        for k in range(self.n_fingerprints + 1):
-            if 2 * k - self.n_fingerprints > self.c_threshold:
-                a += self.matches[k]
-        self.a = a
+        self.a = self.matches[self.a_mask].sum()
 
     def set_d(self):
         """Calculate the (unweighted) 0-similarity counter."""
-        d = 0
-        for k in range(self.n_fingerprints + 1):
-            if self.n_fingerprints - 2 * k > self.c_threshold:
-                d += self.matches[k]
-        self.d = d
+        self.d = self.matches[self.d_mask].sum()
 
     def set_weighted_a(self):
         """Calculate the (weighted) 1-similarity counter."""
-        w_a = 0
-        for k in range(self.n_fingerprints + 1):
-            if 2 * k - self.n_fingerprints > self.c_threshold:
-                w_a += self.weighted_matches[k]
-        self.w_a = w_a
+        self.w_a = self.weighted_matches[self.a_mask].sum()
 
     def set_weighted_d(self):
         """Calculate the (weighted) 0-similarity counter."""
-        w_d = 0
-        for k in range(self.n_fingerprints + 1):
-            if self.n_fingerprints - 2 * k > self.c_threshold:
-                w_d += self.weighted_matches[k]
-        self.w_d = w_d
+        self.w_d = self.weighted_matches[self.d_mask].sum()
 
     def set_dis_counters(self):
         """Calculate the (unweighted) dissimilarity counters."""
-        d_counters = []
-        for k in range(self.n_fingerprints + 1):
-            if self.d_vector[k] <= self.c_threshold:
-                d_counters.append(self.matches[k])
-        self.dis_counters = np.array(d_counters)
+        self.dis_counters = self.matches.take(self.dis_index)
 
     def set_weighted_dis_counters(self):
         """Calculate the (weighted) dissimilarity counters."""
-        w_d_counters = []
-        for k in range(self.n_fingerprints + 1):
-            if self.d_vector[k] <= self.c_threshold:
-                w_d_counters.append(self.weighted_matches[k])
-        self.w_dis_counters = np.array(w_d_counters)
+        self.w_dis_counters = self.weighted_matches.take(self.dis_index)
 
     def set_total_sim_counter(self):
         """Calculate the total number of (unweighted) similarity counters."""
@@ -325,3 +434,18 @@ class BaseComparisons(object):
     def set_weighted_p(self):
         """Calculate weighted p."""
         self.w_p = self.total_w_sim + self.total_w_dis
+
+
+class Comparisons(BaseComparisons):
+    """Counters of a set of fingerprints, computed once and shared by the indices.
+
+    Pass it as ``comparisons`` to any of the index classes to calculate
+    several indices of the same set without recomputing the column sums,
+    matches and counters for each one.
+
+    Example
+    -------
+    comparisons = Comparisons(fingerprints, c_threshold, w_factor)
+    ja = Jaccard(comparisons=comparisons)
+    sm = SokalMichner(comparisons=comparisons)
+    """
@@ -0,0 +1,67 @@
+"""Calculate one index for many groups of fingerprints at once."""
+import importlib
+
+import numpy as np
+from indices.base import BaseComparisons
+from indices.indices_info import Indices
+
+
+def _index_class(abbreviation):
+    """Return the class of the index with the given abbreviation."""
+    for name, (class_name, abbr, ways) in Indices.items():
+        if abbr == abbreviation:
+            module = importlib.import_module("indices." + name.lower().replace("-", "_"))
+            return getattr(module, class_name), ways
+    raise ValueError("Unknown index: {}".format(abbreviation))
+
+
+def score_all(fingerprints, group_sizes, c_threshold=None, w_factor="fraction",
+              index="RR", way="1sim_wdis"):
+    """Calculate an index for every group of a ragged set of fingerprints.
+
+    Parameters
+    ----------
+    fingerprints : np.ndarray
+        Fingerprints of all the groups, one after the other
+        (shape (sum(group_sizes), m)).
+    group_sizes : array_like
+        Number of fingerprints in each group (at least 2).
+    c_threshold : {None, 'dissimilar', int}
+        Coincidence threshold, resolved for each group size.
+    w_factor : {"fraction", "power_n"}
+        Type of weight function that will be used.
+    index : str
+        Abbreviation of the index (see indices_info.Indices).
+    way : str
+        Way of calculating the index, e.g. "1sim_wdis".
+
+    Returns
+    -------
+    results : np.ndarray
+        Value of the index for each group.
+
+    Notes
+    -----
+    The column sums of all the groups are reduced in a single np.add.reduceat
+    pass, which is the expensive part for wide fingerprints. Only the
+    (n + 1)-long counters are then computed group by group.
+    """
+    index_class, ways = _index_class(index)
+    if way not in ways:
+        raise ValueError("{} can be calculated as one of {}.".format(index, ways))
+    fingerprints = np.ascontiguousarray(fingerprints, dtype=np.uint8)
+    group_sizes = np.asarray(group_sizes, dtype=np.int64)
+    if np.any(group_sizes < 2):
+        raise ValueError("A minimum of 2 fingerprints must be provided in each group.")
+    if group_sizes.sum() != len(fingerprints):
+        raise ValueError("The group sizes must add up to the number of fingerprints.")
+    offsets = np.concatenate(([0], np.cumsum(group_sizes)[:-1]))
+    c_totals = np.add.reduceat(fingerprints, offsets, axis=0, dtype=np.int32)
+    attribute = "{}_{}".format(index, way)
+    results = np.empty(len(group_sizes))
+    for g, (n_fingerprints, c_total) in enumerate(zip(group_sizes.tolist(), c_totals)):
+        matches = np.bincount(c_total, minlength=n_fingerprints + 1)
+        comparisons = BaseComparisons.from_matches(matches, n_fingerprints,
+                                                   c_threshold, w_factor)
+        results[g] = getattr(index_class(comparisons=comparisons), attribute)
+    return results
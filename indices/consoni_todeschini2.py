@@ -1,4 +1,4 @@
-from math import log
+from math import log1p
 from indices.base import BaseComparisons
 
 
@@ -23,7 +23,7 @@ class ConsoniTodeschini2(BaseComparisons):
 
     Methods
     -------
-    __init__(self, fingerprints, c_threshold=None, w_factor="fraction")
+    __init__(self, fingerprints=None, c_threshold=None, w_factor="fraction", comparisons=None)
         Initialize the object.
     assign_fingerprints(fingerprints)
         Assign fingerprints.
@@ -67,7 +67,7 @@ class ConsoniTodeschini2(BaseComparisons):
          Calculate the index with 1-sim-counters and with unweighted denominator.
     """
 
-    def __init__(self, fingerprints, c_threshold=None, w_factor="fraction"):
+    def __init__(self, fingerprints=None, c_threshold=None, w_factor="fraction", comparisons=None):
         """Initialize the object.
 
         Parameters
@@ -79,8 +79,12 @@ class ConsoniTodeschini2(BaseComparisons):
             Coincidence threshold.
         w_factor : {"fraction", "power_n"}
             Type of weight function that will be used.
+        comparisons : BaseComparisons, optional
+            Object already built for the same fingerprints, c_threshold
+            and w_factor. Its counters are reused instead of recomputed
+            and the other arguments are ignored.
         """
-        super().__init__(fingerprints, c_threshold, w_factor)
+        super().__init__(fingerprints, c_threshold, w_factor, comparisons)
         self.ct2_1sim_wdis()
         self.ct2_1sim_dis()
 
@@ -91,8 +95,8 @@ class ConsoniTodeschini2(BaseComparisons):
         ----
         (log(1 + w_p) - log(1 + w_b + w_c))/log(1 + w_p)
         """
-        numerator = log(1 + self.w_p) - log(1 + self.total_w_dis)
-        denominator = log(1 + self.w_p)
+        numerator = self.log1p_w_p - log1p(self.total_w_dis)
+        denominator = self.log1p_w_p
         self.CT2_1sim_wdis = numerator/denominator
 
     def ct2_1sim_dis(self):
@@ -102,6 +106,6 @@ class ConsoniTodeschini2(BaseComparisons):
         ----
         (log(1 + w_p) - log(1 + w_b + w_c))/log(1 + p)
         """
-        numerator = log(1 + self.w_p) - log(1 + self.total_w_dis)
-        denominator = log(1 + self.p)
+        numerator = self.log1p_w_p - log1p(self.total_w_dis)
+        denominator = self.log1p_p
         self.CT2_1sim_dis = numerator/denominator
@@ -1,4 +1,4 @@
-from math import log
+from math import log1p
 from indices.base import BaseComparisons
 
 
@@ -23,7 +23,7 @@ class ConsoniTodeschini4(BaseComparisons):
 
     Methods
     -------
-    __init__(self, fingerprints, c_threshold=None, w_factor="fraction")
+    __init__(self, fingerprints=None, c_threshold=None, w_factor="fraction", comparisons=None)
         Initialize the object.
     assign_fingerprints(fingerprints)
         Assign fingerprints.
@@ -67,7 +67,7 @@ class ConsoniTodeschini4(BaseComparisons):
          Calculate the index with 1-sim-counters and with unweighted denominator.
     """
 
-    def __init__(self, fingerprints, c_threshold=None, w_factor="fraction"):
+    def __init__(self, fingerprints=None, c_threshold=None, w_factor="fraction", comparisons=None):
         """Initialize the object.
 
         Parameters
@@ -79,11 +79,13 @@ class ConsoniTodeschini4(BaseComparisons):
             Coincidence threshold.
         w_factor : {"fraction", "power_n"}
             Type of weight function that will be used.
+        comparisons : BaseComparisons, optional
+            Object already built for the same fingerprints, c_threshold
+            and w_factor. Its counters are reused instead of recomputed
+            and the other arguments are ignored.
         """
-        super().__init__(fingerprints, c_threshold, w_factor)
-        self.ct4_sim_wdis()
+        super().__init__(fingerprints, c_threshold, w_factor, comparisons)
         self.ct4_1sim_wdis()
-        self.ct4_sim_dis()
         self.ct4_1sim_dis()
 
     def ct4_1sim_wdis(self):
@@ -93,8 +95,8 @@ class ConsoniTodeschini4(BaseComparisons):
         ----
         log(1 + w_a)/log(1 + w_a + w_b + w_c)
         """
-        numerator = log(1 + self.w_a)
-        denominator = log(1 + self.w_a + self.total_w_dis)
+        numerator = log1p(self.w_a)
+        denominator = log1p(self.w_a + self.total_w_dis)
         self.CT4_1sim_wdis = numerator/denominator
 
     def ct4_1sim_dis(self):
@@ -104,6 +106,6 @@ class ConsoniTodeschini4(BaseComparisons):
         ----
         log(1 + w_a)/log(1 + a + b + c)
         """
-        numerator = log(1 + self.w_a)
-        denominator = log(1 + self.a + self.total_dis)
+        numerator = log1p(self.w_a)
+        denominator = log1p(self.a + self.total_dis)
         self.CT4_1sim_dis = numerator/denominator
@@ -22,7 +22,7 @@ class GoodmanKruskal(BaseComparisons):
 
     Methods
     -------
-    __init__(self, fingerprints, c_threshold=None, w_factor="fraction")
+    __init__(self, fingerprints=None, c_threshold=None, w_factor="fraction", comparisons=None)
         Initialize the object.
     assign_fingerprints(fingerprints)
         Assign fingerprints.
@@ -66,7 +66,7 @@ class GoodmanKruskal(BaseComparisons):
          Calculate the index with 1-sim-counters and with unweighted denominator.
     """
 
-    def __init__(self, fingerprints, c_threshold=None, w_factor="fraction"):
+    def __init__(self, fingerprints=None, c_threshold=None, w_factor="fraction", comparisons=None):
         """Initialize the object.
 
         Parameters
@@ -78,8 +78,12 @@ class GoodmanKruskal(BaseComparisons):
             Coincidence threshold.
         w_factor : {"fraction", "power_n"}
             Type of weight function that will be used.
+        comparisons : BaseComparisons, optional
+            Object already built for the same fingerprints, c_threshold
+            and w_factor. Its counters are reused instead of recomputed
+            and the other arguments are ignored.
         """
-        super().__init__(fingerprints, c_threshold, w_factor)
+        super().__init__(fingerprints, c_threshold, w_factor, comparisons)
         self.gk_1sim_wdis()
         self.gk_1sim_dis()
 
@@ -90,8 +94,8 @@ class GoodmanKruskal(BaseComparisons):
         ----
         (2 * min(w_a, w_d) - w_b - w_c)/(2 * min(w_a, w_d) + w_b + w_c)
         """
-        numerator = 2 * min(self.w_a, self.w_d) - self.total_w_dis
-        denominator = 2 * min(self.w_a, self.w_d) + self.total_w_dis
+        numerator = 2 * self.min_wa_wd - self.total_w_dis
+        denominator = 2 * self.min_wa_wd + self.total_w_dis
         self.GK_1sim_wdis = numerator/denominator
 
     def gk_1sim_dis(self):
@@ -101,6 +105,6 @@ class GoodmanKruskal(BaseComparisons):
         ----
         (2 * min(w_a, w_d) - w_b - w_c)/(2 * min(a, d) + b + c)
         """
-        numerator = 2 * min(self.w_a, self.w_d) - self.total_w_dis
-        denominator = 2 * min(self.a, self.d) + self.total_dis
+        numerator = 2 * self.min_wa_wd - self.total_w_dis
+        denominator = 2 * self.min_a_d + self.total_dis
         self.GK_1sim_dis = numerator / denominator
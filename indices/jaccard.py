@@ -1,3 +1,4 @@
+from indices._kernels import jaccard_indices, safe_divide
 from indices.base import BaseComparisons
 
 
@@ -7,6 +8,8 @@ class Jaccard(BaseComparisons):
     n=2 formula:
         (3 * a)/(3 * a + b + c)
 
+    The index is taken as 0 when its denominator is 0.
+
     Attributes
     ----------
     fingerprints : np.ndarray
@@ -22,7 +25,7 @@ class Jaccard(BaseComparisons):
 
     Methods
     -------
-    __init__(self, fingerprints, c_threshold=None, w_factor="fraction")
+    __init__(self, fingerprints=None, c_threshold=None, w_factor="fraction", comparisons=None)
         Initialize the object.
     assign_fingerprints(fingerprints)
         Assign fingerprints.
@@ -70,7 +73,7 @@ class Jaccard(BaseComparisons):
          Calculate the index with 1-sim-counters and with unweighted denominator.
     """
 
-    def __init__(self, fingerprints, c_threshold=None, w_factor="fraction"):
+    def __init__(self, fingerprints=None, c_threshold=None, w_factor="fraction", comparisons=None):
         """Initialize the object.
 
         Parameters
@@ -82,12 +85,25 @@ class Jaccard(BaseComparisons):
             Coincidence threshold.
         w_factor : {"fraction", "power_n"}
             Type of weight function that will be used.
+        comparisons : BaseComparisons, optional
+            Object already built for the same fingerprints, c_threshold
+            and w_factor. Its counters are reused instead of recomputed
+            and the other arguments are ignored.
+        """
+        super().__init__(fingerprints, c_threshold, w_factor, comparisons)
+        self._compute_all()
+
+    def _compute_all(self):
+        """Calculate the four variants of the index at once.
+
+        Note
+        ----
+        Same values as ja_sim_wdis, ja_1sim_wdis, ja_sim_dis and ja_1sim_dis,
+        with the shared terms computed once.
         """
-        super().__init__(fingerprints, c_threshold, w_factor)
-        self.ja_sim_wdis()
-        self.ja_1sim_wdis()
-        self.ja_sim_dis()
-        self.ja_1sim_dis()
+        indices = jaccard_indices(self.total_w_sim, self.w_a, self.total_w_dis,
+                                  self.total_sim, self.total_dis, self.a)
+        self.Ja_sim_wdis, self.Ja_1sim_wdis, self.Ja_sim_dis, self.Ja_1sim_dis = indices
 
     def ja_sim_wdis(self):
         """Calculate the index with sim-counters and with weighted denominator.
@@ -97,8 +113,8 @@ class Jaccard(BaseComparisons):
         (3 * (w_a + w_d))/(3 * (w_a + w_d) + w_b + w_c)
         """
         numerator = 3 * self.total_w_sim
-        denominator = 3 * self.total_w_sim + self.total_w_dis
-        self.Ja_sim_wdis = numerator/denominator
+        denominator = numerator + self.total_w_dis
+        self.Ja_sim_wdis = safe_divide(numerator, denominator)
 
     def ja_1sim_wdis(self):
         """Calculate the index with 1-sim-counters and with weighted denominator.
@@ -108,8 +124,8 @@ class Jaccard(BaseComparisons):
         (3 * w_a)/(3 * w_a + w_b + w_c)
         """
         numerator = 3 * self.w_a
-        denominator = 3 * self.w_a + self.total_w_dis
-        self.Ja_1sim_wdis = numerator/denominator
+        denominator = numerator + self.total_w_dis
+        self.Ja_1sim_wdis = safe_divide(numerator, denominator)
 
     def ja_sim_dis(self):
         """Calculate the index with sim-counters and with unweighted denominator.
@@ -120,7 +136,7 @@ class Jaccard(BaseComparisons):
         """
         numerator = 3 * self.total_w_sim
         denominator = 3 * self.total_sim + self.total_dis
-        self.Ja_sim_dis = numerator/denominator
+        self.Ja_sim_dis = safe_divide(numerator, denominator)
 
     def ja_1sim_dis(self):
         """Calculate the index with 1-sim-counters and with unweighted denominator.
@@ -131,4 +147,4 @@ class Jaccard(BaseComparisons):
         """
         numerator = 3 * self.w_a
         denominator = 3 * self.a + self.total_dis
-        self.Ja_1sim_dis = numerator/denominator
+        self.Ja_1sim_dis = safe_divide(numerator, denominator)
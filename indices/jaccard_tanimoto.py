@@ -1,3 +1,4 @@
+from indices._kernels import jaccard_tanimoto_indices, safe_divide
 from indices.base import BaseComparisons
 
 
@@ -7,6 +8,8 @@ class JaccardTanimoto(BaseComparisons):
     n=2 formula:
         a/(a + b + c)
 
+    The index is taken as 0 when its denominator is 0.
+
     Attributes
     ----------
     fingerprints : np.ndarray
@@ -22,7 +25,7 @@ class JaccardTanimoto(BaseComparisons):
 
     Methods
     -------
-    __init__(self, fingerprints, c_threshold=None, w_factor="fraction")
+    __init__(self, fingerprints=None, c_threshold=None, w_factor="fraction", comparisons=None)
         Initialize the object.
     assign_fingerprints(fingerprints)
         Assign fingerprints.
@@ -66,7 +69,7 @@ class JaccardTanimoto(BaseComparisons):
          Calculate the index with 1-sim-counters and with unweighted denominator.
     """
 
-    def __init__(self, fingerprints, c_threshold=None, w_factor="fraction"):
+    def __init__(self, fingerprints=None, c_threshold=None, w_factor="fraction", comparisons=None):
         """Initialize the object.
 
         Parameters
@@ -78,12 +81,23 @@ class JaccardTanimoto(BaseComparisons):
             Coincidence threshold.
         w_factor : {"fraction", "power_n"}
             Type of weight function that will be used.
+        comparisons : BaseComparisons, optional
+            Object already built for the same fingerprints, c_threshold
+            and w_factor. Its counters are reused instead of recomputed
+            and the other arguments are ignored.
+        """
+        super().__init__(fingerprints, c_threshold, w_factor, comparisons)
+        self._compute_all()
+
+    def _compute_all(self):
+        """Calculate the variants of the index at once.
+
+        Note
+        ----
+        Same values as jt_1sim_wdis and jt_1sim_dis.
         """
-        super().__init__(fingerprints, c_threshold, w_factor)
-        self.jt_sim_wdis()
-        self.jt_1sim_wdis()
-        self.jt_sim_dis()
-        self.jt_1sim_dis()
+        self.JT_1sim_wdis, self.JT_1sim_dis = jaccard_tanimoto_indices(self.w_a, self.total_w_dis,
+                                                                       self.a, self.total_dis)
 
     def jt_1sim_wdis(self):
         """Calculate the index with 1-sim-counters and with weighted denominator.
@@ -93,8 +107,8 @@ class JaccardTanimoto(BaseComparisons):
         w_a/(w_a + w_b + w_c)
         """
         numerator = self.w_a
-        denominator = self.w_a + self.total_w_dis
-        self.JT_1sim_wdis = numerator/denominator
+        denominator = numerator + self.total_w_dis
+        self.JT_1sim_wdis = safe_divide(numerator, denominator)
 
     def jt_1sim_dis(self):
         """Calculate the index with 1-sim-counters and with unweighted denominator.
@@ -105,4 +119,4 @@ class JaccardTanimoto(BaseComparisons):
         """
         numerator = self.w_a
         denominator = self.a + self.total_dis
-        self.JT_1sim_dis = numerator/denominator
+        self.JT_1sim_dis = safe_divide(numerator, denominator)
@@ -0,0 +1,56 @@
+from indices.base import BaseComparisons
+from indices.jaccard import Jaccard
+from indices.jaccard_tanimoto import JaccardTanimoto
+from indices.russell_rao import RussellRao
+
+
+class MultiIndex(BaseComparisons):
+    """Class to calculate the Jaccard, Jaccard-Tanimoto and Russell-Rao indices together.
+
+    The counters are calculated once and all the variants of the three
+    indices are computed from them, instead of building one object per index.
+
+    Attributes
+    ----------
+    fingerprints : np.ndarray
+        Numpy array with the fingerprints that will be compared.
+        The fingerprints must be also given as Numpy arrays.
+    c_threshold : {None, 'dissimilar', int}
+        Coincidence threshold.
+
+    Properties
+    ----------
+    n_fingerprints : int
+        Number of fingerprints that will be compared.
+
+    Methods
+    -------
+    __init__(self, fingerprints=None, c_threshold=None, w_factor="fraction", comparisons=None)
+        Initialize the object.
+
+    The index values are stored with the attribute names of the single index
+    classes: Ja_sim_wdis, Ja_1sim_wdis, Ja_sim_dis, Ja_1sim_dis,
+    JT_1sim_wdis, JT_1sim_dis, RR_1sim_wdis and RR_1sim_dis.
+    """
+
+    def __init__(self, fingerprints=None, c_threshold=None, w_factor="fraction", comparisons=None):
+        """Initialize the object.
+
+        Parameters
+        ----------
+        fingerprints : np.ndrarray
+            Numpy array with the fingerprints that will be compared.
+            The fingerprints must be also given as Numpy arrays.
+        c_threshold : {None, 'dissimilar', int}
+            Coincidence threshold.
+        w_factor : {"fraction", "power_n"}
+            Type of weight function that will be used.
+        comparisons : BaseComparisons, optional
+            Object already built for the same fingerprints, c_threshold
+            and w_factor. Its counters are reused instead of recomputed
+            and the other arguments are ignored.
+        """
+        super().__init__(fingerprints, c_threshold, w_factor, comparisons)
+        Jaccard._compute_all(self)
+        JaccardTanimoto._compute_all(self)
+        RussellRao._compute_all(self)
@@ -1,3 +1,4 @@
+from indices._kernels import russell_rao_indices, safe_divide
 from indices.base import BaseComparisons
 
 
@@ -7,6 +8,8 @@ class RussellRao(BaseComparisons):
     n=2 formula:
         a/p
 
+    The index is taken as 0 when its denominator is 0.
+
     Attributes
     ----------
     fingerprints : np.ndarray
@@ -22,7 +25,7 @@ class RussellRao(BaseComparisons):
 
     Methods
     -------
-    __init__(self, fingerprints, c_threshold=None, w_factor="fraction")
+    __init__(self, fingerprints=None, c_threshold=None, w_factor="fraction", comparisons=None)
         Initialize the object.
     assign_fingerprints(fingerprints)
         Assign fingerprints.
@@ -66,7 +69,7 @@ class RussellRao(BaseComparisons):
          Calculate the index with 1-sim-counters and with unweighted denominator.
     """
 
-    def __init__(self, fingerprints, c_threshold=None, w_factor="fraction"):
+    def __init__(self, fingerprints=None, c_threshold=None, w_factor="fraction", comparisons=None):
         """Initialize the object.
 
         Parameters
@@ -78,12 +81,22 @@ class RussellRao(BaseComparisons):
             Coincidence threshold.
         w_factor : {"fraction", "power_n"}
             Type of weight function that will be used.
+        comparisons : BaseComparisons, optional
+            Object already built for the same fingerprints, c_threshold
+            and w_factor. Its counters are reused instead of recomputed
+            and the other arguments are ignored.
+        """
+        super().__init__(fingerprints, c_threshold, w_factor, comparisons)
+        self._compute_all()
+
+    def _compute_all(self):
+        """Calculate the variants of the index at once.
+
+        Note
+        ----
+        Same values as rr_1sim_wdis and rr_1sim_dis.
         """
-        super().__init__(fingerprints, c_threshold, w_factor)
-        self.rr_sim_wdis()
-        self.rr_1sim_wdis()
-        self.rr_sim_dis()
-        self.rr_1sim_dis()
+        self.RR_1sim_wdis, self.RR_1sim_dis = russell_rao_indices(self.w_a, self.w_p, self.p)
 
     def rr_1sim_wdis(self):
         """Calculate the index with 1-sim-counters and with weighted denominator.
@@ -94,7 +107,7 @@ class RussellRao(BaseComparisons):
         """
         numerator = self.w_a
         denominator = self.w_p
-        self.RR_1sim_wdis = numerator/denominator
+        self.RR_1sim_wdis = safe_divide(numerator, denominator)
 
     def rr_1sim_dis(self):
         """Calculate the index with 1-sim-counters and with unweighted denominator.
@@ -105,4 +118,4 @@ class RussellRao(BaseComparisons):
         """
         numerator = self.w_a
         denominator = self.p
-        self.RR_1sim_dis = numerator/denominator
+        self.RR_1sim_dis = safe_divide(numerator, denominator)
@@ -1,5 +1,25 @@
 import random
 import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+
+import numpy as np
+
+# Name pattern of the resumed CV files
+_CV_RE = re.compile(r'SRD.*FP.*m.*n.*CV.*txt')
+# Calculation information encoded in the name of a resumed CV file
+_CV_NAME_RE = re.compile(r'SRD(?P<weight_info>[^F]*)FP(?P<fp_total>\d+)m(?P<m>\d+)n(?P<n>\d+)CV(?P<CV>[^_]*)')
+# Names that already passed the check
+_VALIDATED_CV_FILES = set()
+
+
+def _check_cv_file(cv_file):
+    """Raise TypeError if cv_file is not named like a resumed CV file."""
+    if cv_file in _VALIDATED_CV_FILES:
+        return
+    if not _CV_RE.fullmatch(cv_file):
+        raise TypeError("cv_file must be a CV file.")
+    _VALIDATED_CV_FILES.add(cv_file)
 
 
 def gen_headers(cv_file):
@@ -25,8 +45,7 @@ def gen_headers(cv_file):
     F3: one of 'w': weighted index, 'nw': unweighted index.
     The rest of the headers are the similarity indices.
     """
-    if not re.match(r'SRD.*FP.*m.*n.*CV.*txt', cv_file):
-        raise TypeError("cv_file must be a CV file.")
+    _check_cv_file(cv_file)
     with open(cv_file, "r") as infile:
         lines = infile.readlines()
     headers = lines[0].strip().split()[1:]
@@ -52,24 +71,26 @@ def read_data(cv_file):
     content, na, nb
     content: Raw content of the cv analysis.
     na: Line where the sequential CV results end.
-    nb: Line where the random CV results end.
+    nb: Number of random CV results.
     """
-    if not re.match(r'SRD.*FP.*m.*n.*CV.*txt', cv_file):
-        raise TypeError("cv_file must be a CV file.")
-    with open(cv_file, "r") as infile:
-        lines = infile.readlines()
-    content = lines[2:]
+    _check_cv_file(cv_file)
+    content = []
     na = 0
     nb = 0
-    for line in content:
-        if "_A" in line:
-            na += 1
-        elif "_B" in line:
-            nb += 1
-    infile.close()
+    with open(cv_file, "r") as infile:
+        # the first two lines are the headers
+        next(infile, None)
+        next(infile, None)
+        for line in infile:
+            content.append(line)
+            if "_A" in line:
+                na += 1
+            elif "_B" in line:
+                nb += 1
     return content, na, nb
 
 
+@lru_cache(maxsize=None)
 def extract_cv_name_data(cv_file):
     """Extract the calculation information from the name of the cv_file.
 
@@ -86,38 +107,48 @@ def extract_cv_name_data(cv_file):
     Returns
     -------
     weight_info, n, fp_total, m, CV
+    The results are cached by file name.
     weight_info: 'w' or 'nw'.
     n: Number of fingerprints compared simultaneously.
     fp_total: Total number of fingerprints.
     m: Length of the fingerprints.
     CV: Fraction of the data left out as test set.
     """
-    if not re.match(r'SRD.*FP.*m.*n.*CV.*txt', cv_file):
+    _check_cv_file(cv_file)
+    name_data = _CV_NAME_RE.search(cv_file)
+    if not name_data:
         raise TypeError("cv_file must be a CV file.")
-    data = cv_file.split("SRD")[-1]
-    weight_info = data.split("FP")[0]
-    n = data.split("n")[-1].split("CV")[0]
-    fp_total = data.split("FP")[-1].split("m")[0]
-    m = data.split("m")[-1].split("n")[0]
-    CV = data.split("CV")[-1].split("_")[0]
-    return weight_info, n, fp_total, m, CV
+    return name_data.group("weight_info", "n", "fp_total", "m", "CV")
 
 
-def gen_b_indices(na, nb):
+def gen_b_indices(na, nb, seed=None):
     """Select the indices of the random CV results that will be used in the ANOVA.
 
     Arguments
     ---------
     na : int
-        Line where the sequential CV results end.
+        Number of sequential CV results.
     nb : int
-        Line where the random CV results end.
+        Number of random CV results.
+    seed : {None, int}
+        Seed of the random selection, for reproducible ANOVA inputs.
+
+    Raises
+    ------
+    ValueError
+        If there are less random than sequential CV results.
 
     Returns
     -------
     List of indices of the random CV results that will be used in the ANOVA.
+    The content of a CV file is the normalized line, the na sequential lines
+    and the nb random lines, so the random lines are na + 1, ..., na + nb.
     """
-    return random.sample(range(na + 1, nb + 1), na)
+    if na > nb:
+        raise ValueError("There must be at least as many random as sequential CV results.")
+    # without a seed the global random state is used, so random.seed() still applies
+    rng = random if seed is None else random.Random(seed)
+    return rng.sample(range(na + 1, na + nb + 1), na)
 
 
 def process_cv_file(cv_file, b_indices):
@@ -141,28 +172,20 @@ def process_cv_file(cv_file, b_indices):
         List that contains two sub-lists. The first has the results of the sequential CV.
         The second has the results of the selected random CV.
     """
-    if not re.match(r'SRD.*FP.*m.*n.*CV.*txt', cv_file):
-        raise TypeError("cv_file must be a CV file.")
+    _check_cv_file(cv_file)
     content, na, nb = read_data(cv_file)
     weight_info, n, FP, m, CV = extract_cv_name_data(cv_file)
-    norm_line = content[0]
-    a_lines = content[1: na + 1]
-    b_lines = []
-    for index in b_indices:
-        b_lines.append(content[index])
-    file_lists = []
-    norm_line = ["Norm", "n" + n, weight_info] + norm_line.strip().split()[1:]
-    file_lists.append(norm_line)
-    for a_line in a_lines:
-        a_line = ["A", "n" + n, weight_info] + a_line.strip().split()[1:]
-        file_lists.append(a_line)
-    for b_line in b_lines:
-        b_line = ["B", "n" + n, weight_info] + b_line.strip().split()[1:]
-        file_lists.append(b_line)
+    n_label = "n" + n
+    # the first column of every line is the name of the result
+    file_lists = [["Norm", n_label, weight_info, *content[0].split(None, 1)[1].split()]]
+    file_lists.extend(["A", n_label, weight_info, *a_line.split(None, 1)[1].split()]
+                      for a_line in content[1: na + 1])
+    file_lists.extend(["B", n_label, weight_info, *content[index].split(None, 1)[1].split()]
+                      for index in b_indices)
     return file_lists
 
 
-def gen_total_data(cv_file_list, b_indices):
+def gen_total_data(cv_file_list, b_indices, n_jobs=None):
     """Extract the CV results that will be used in the ANOVA from a list of cv files.
 
         Arguments
@@ -171,24 +194,28 @@ def gen_total_data(cv_file_list, b_indices):
             List with the files containing the results of the resumed CV analysis.
         b_indices : list
             List of indices of the random CV results that will be used in the ANOVA.
+        n_jobs : {None, int}
+            Number of threads reading the cv files (None: executor default).
+            The output keeps the order of the files.
 
         Returns
         -------
-        total_data : list
-            List that contains all the CV results that will be used in the ANOVA.
+        total_data : np.ndarray
+            String array with all the CV results that will be used in the ANOVA,
+            one row per result, preceded by two columns with the row number.
         """
-    total_data = []
     cv_files = {"w": {}, "nw": {}}
     for cv_file in cv_file_list:
         weight_info, n, FP, m, CV = extract_cv_name_data(cv_file)
         cv_files[weight_info][int(n)] = cv_file
-    
-    for w in sorted(cv_files):
-        for n in sorted(cv_files[w]):
-            cv_file = cv_files[w][n]
-            total_data += process_cv_file(cv_file, b_indices)
-    total_data = [[str(i), str(i)] + line for i, line in enumerate(total_data, 1)]
-    return total_data
+    ordered_files = [cv_files[w][n] for w in sorted(cv_files) for n in sorted(cv_files[w])]
+    # reading and parsing are independent for every file
+    with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+        file_lists = executor.map(partial(process_cv_file, b_indices=b_indices), ordered_files)
+        total_data = [line for file_list in file_lists for line in file_list]
+    total_data = np.array(total_data, dtype=str)
+    numbers = np.arange(1, len(total_data) + 1).astype(str)
+    return np.column_stack((numbers, numbers, total_data))
 
 
 def gen_outfile_name(cv_file_list):
@@ -204,19 +231,12 @@ def gen_outfile_name(cv_file_list):
     s : str
         Name of the file that will serve as input to the ANOVA.
     """
-    weights = []
-    n_min = 2
-    n_max = 2
-    for cv_file in cv_file_list:
-        weight_info, n, FP, m, CV = extract_cv_name_data(cv_file)
-        if weight_info not in weights:
-            weights.append(weight_info)
-        if int(n) < n_min:
-            n_min = int(n)
-        elif int(n) > n_max:
-            n_max = int(n)
-    s = "ARSRD" + sorted(weights)[0] + sorted(weights)[1] + "FP" + FP + "m" + m + "n" + str(n_min)
-    s += "n" + str(n_max) + "CV" + CV + ".dat"
+    name_data = [extract_cv_name_data(cv_file) for cv_file in cv_file_list]
+    weights = sorted({weight_info for weight_info, *_ in name_data})
+    ns = [int(n) for _, n, *_ in name_data]
+    weight_info, n, FP, m, CV = name_data[-1]
+    s = "ARSRD" + "".join(weights) + "FP" + FP + "m" + m + "n" + str(min(ns))
+    s += "n" + str(max(ns)) + "CV" + CV + ".dat"
     return s
     
 
@@ -227,30 +247,25 @@ def output_file(headers, total_data, outfile_name):
     ---------
     headers : list
         List with the headers that will be used.
-    total_data : list
-        List that contains all the CV results that will be used in the ANOVA.
+    total_data : np.ndarray
+        String array with all the CV results that will be used in the ANOVA.
     outfile_name : str
         Name of the file that will serve as input to the ANOVA.
 
     Creates the .dat file that will be used as input in the ANOVA.
     """
-    s = "              "
-    for header in headers:
-        s += "{:14}".format(header)
-    s += "\n"
-    for line in total_data:
-        for item in line:
-            s += "{:14}".format(item)
-        s += "\n"
-    with open(outfile_name, "w") as outfile:
-        outfile.write(s)
+    header = 14 * " " + "".join(f"{header:14}" for header in headers)
+    # savetxt streams the rows, the 1 MiB buffer groups them into few writes
+    with open(outfile_name, "w", buffering=1 << 20) as outfile:
+        np.savetxt(outfile, total_data, fmt="%-14s", delimiter="", header=header, comments="")
 
 
 if __name__ == "__main__":
     # Generates the ANOVA input .dat file for all the resumed CV files in the given folder.
-    import glob
-    cv_file_list = [cv_file for cv_file in glob.glob("*.txt")
-                    if re.match(r'SRD.*FP.*m.*n.*CV.*txt', cv_file)]
+    import os
+    with os.scandir(".") as entries:
+        cv_file_list = [entry.name for entry in entries
+                        if _CV_RE.fullmatch(entry.name) and entry.is_file()]
     headers = gen_headers(cv_file_list[0])
     _, na, nb = read_data(cv_file_list[0])
     b_indices = gen_b_indices(na, nb)
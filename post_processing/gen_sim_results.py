@@ -1,6 +1,11 @@
+import importlib
 import numpy as np
-from itertools import combinations
-from scipy.special import binom
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from itertools import chain, combinations
+from math import comb
+from indices._kernels import all_pair_matches, combination_matches
+from indices.base import BaseComparisons
 from indices.indices_info import Indices
 
 
@@ -28,6 +33,14 @@ def _file_name_gen(key):
     return name
 
 
+# Random generator of the fingerprints
+_RNG = np.random.default_rng()
+
+# Class of every index, imported once: Index_classes[key] = class
+Index_classes = {key: getattr(importlib.import_module("indices." + _file_name_gen(key)), Indices[key][0])
+                 for key in Indices}
+
+
 def generate_bitstring(size):
     """Generate a random fingerprint.
 
@@ -39,11 +52,11 @@ def generate_bitstring(size):
     Returns
     -------
     fingerprint : np.ndarray
-        Fingerprint as a numpy array.
+        Fingerprint as a numpy uint8 array.
     """
     if not isinstance(size, int):
         raise TypeError("size can only be an integer.")
-    return np.random.choice([0, 1], size=size)
+    return _RNG.integers(0, 2, size=size, dtype=np.uint8)
 
 
 def gen_fingerprints(fp_total, fp_size):
@@ -59,18 +72,87 @@ def gen_fingerprints(fp_total, fp_size):
     Returns
     -------
     total_fingerprints : np.array
-        Numpy array containing the fingerprints.
+        uint8 numpy array of shape (fp_total, fp_size) containing the fingerprints.
+    """
+    if not isinstance(fp_size, int):
+        raise TypeError("size can only be an integer.")
+    return _RNG.integers(0, 2, size=(fp_total, fp_size), dtype=np.uint8)
+
+
+def _matches_values(matches, n, index_attributes, c_threshold=None, w_factor="fraction"):
+    """Calculate the indices for many sets of fingerprints from their matches.
+
+    Arguments
+    ---------
+    matches : np.ndarray
+        Matches of every set of fingerprints, one row each.
+    n : int
+        Number of fingerprints in each set.
+    index_attributes : list
+        (key, [attributes]) for every index, key of the Indices dict and
+        names of the variants of the index.
+    c_threshold : {None, 'dissimilar', int}
+        Coincidence threshold.
+    w_factor : {"fraction", "power_n"}
+        Type of weight function that will be used.
+
+    Returns
+    -------
+    values : list
+        One float array of values per attribute, in the order of index_attributes.
+
+    Notes
+    -----
+    The counters, and so the indices, of a set only depend on its matches:
+    every distinct matches vector is evaluated once, with the counters shared
+    by all the indices, and its values are given to all the sets with it.
+    """
+    unique_matches, inverse = np.unique(matches, axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+    unique_comparisons = [BaseComparisons.from_matches(row, n, c_threshold, w_factor)
+                          for row in unique_matches]
+    values = []
+    for s_index, attributes in index_attributes:
+        unique_indices = [Index_classes[s_index](comparisons=comparisons)
+                          for comparisons in unique_comparisons]
+        for attribute in attributes:
+            unique_values = np.fromiter((getattr(index, attribute) for index in unique_indices),
+                                        dtype=np.float64, count=len(unique_indices))
+            values.append(unique_values[inverse])
+    return values
+
+
+def _combination_values(index_list, total_fingerprints, index_attributes,
+                        c_threshold=None, w_factor="fraction"):
+    """Calculate the indices for a block of combinations.
+
+    Arguments
+    ---------
+    index_list : np.ndarray
+        Combinations that will be compared, one row of fingerprint indices each.
+    total_fingerprints : np.ndarray
+        Numpy array containing the fingerprints that will be compared.
+    index_attributes : list
+        (key, [attributes]) for every index, key of the Indices dict and
+        names of the variants of the index.
+    c_threshold : {None, 'dissimilar', int}
+        Coincidence threshold.
+    w_factor : {"fraction", "power_n"}
+        Type of weight function that will be used.
+
+    Returns
+    -------
+    values : list
+        One float array of values per attribute, in the order of index_attributes.
     """
-    total_fingerprints = []
-    for i in range(fp_total):
-        total_fingerprints.append(generate_bitstring(fp_size))
-    total_fingerprints = np.array(total_fingerprints)
-    return total_fingerprints
+    fingerprints = np.ascontiguousarray(total_fingerprints, dtype=np.uint8)
+    matches = combination_matches(fingerprints, index_list)
+    return _matches_values(matches, index_list.shape[1], index_attributes, c_threshold, w_factor)
 
 
 def calc_indices(indices=Indices, fp_total=2,
                  total_fingerprints=np.array([np.array([1]), np.array([1])]),
-                 n=2, c_threshold=None, w_factor="fraction"):
+                 n=2, c_threshold=None, w_factor="fraction", n_jobs=1):
     """Calculate the indices and generates the output.
 
     Arguments
@@ -87,6 +169,9 @@ def calc_indices(indices=Indices, fp_total=2,
         Coincidence threshold.
     w_factor : {"fraction", "power_n"}
         Type of weight function that will be used.
+    n_jobs : int
+        Number of processes that share the combinations when n > 2.
+        The results keep the order of the combinations.
 
     Raises
     ------
@@ -100,7 +185,7 @@ def calc_indices(indices=Indices, fp_total=2,
     Returns
     -------
     Results : dict
-        Dictionary with the results of the comparisons.
+        Dictionary with the results of the comparisons, as float arrays.
     """
     if not isinstance(n, int):
         raise TypeError("n must be an integer.")
@@ -113,31 +198,53 @@ def calc_indices(indices=Indices, fp_total=2,
         raise ValueError("n cannot be greater than fp_total.")
 
     # Dictionary that will contain the results of all the comparisons.
-    # Its structure is: Results[index] = (class_name, [index_values])
+    # Its structure is: Results[index] = (class_name, np.array(index_values))
+    # with the arrays allocated up front and filled block by block.
+    n_combinations = comb(fp_total, n)
     Results = {}
-    
+    # (key, [attributes]) for every index, so that each class is built
+    # once per combination and gives all its variants.
+    index_attributes = []
     for s_index in indices:
-        for variant in Indices[s_index][2]:
-            Results[indices[s_index][1] + "_" + variant] = (Indices[s_index][0], [])
+        attributes = [indices[s_index][1] + "_" + variant for variant in Indices[s_index][2]]
+        for attribute in attributes:
+            Results[attribute] = (Indices[s_index][0], np.empty(n_combinations, dtype=np.float64))
+        index_attributes.append((s_index, attributes))
+
+    attributes = [attribute for s_index, variants in index_attributes for attribute in variants]
+    if n == 2:
+        # the matches of all the pairs come from one matrix product
+        blocks = [_matches_values(all_pair_matches(total_fingerprints), 2, index_attributes,
+                                  c_threshold, w_factor)]
+    else:
+        # Sets of n numbers that indicate which fingerprints will be compared at a given time,
+        # one per row of an index array.
+        index_list = np.fromiter(chain.from_iterable(combinations(range(fp_total), n)),
+                                 dtype=np.intp, count=n_combinations * n).reshape(n_combinations, n)
+        block_values = partial(_combination_values, total_fingerprints=total_fingerprints,
+                               index_attributes=index_attributes, c_threshold=c_threshold,
+                               w_factor=w_factor)
+        if n_jobs == 1:
+            blocks = [block_values(index_list)]
+        else:
+            # a few blocks per process balance the load, the map keeps their order
+            with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+                blocks = list(executor.map(block_values, np.array_split(index_list, 4 * n_jobs)))
 
-    # Sets of n numbers that indicate which fingerprints will be compared at a given time.
-    index_list = list(combinations(range(fp_total), n))
-    
     # Populating the Results dict with the results of the comparisons.
-    for inds in index_list:
-        fingerprints = total_fingerprints[list(inds)]
-        for s_index in sorted(Results):
-            h = "fingerprints=np.array([np.array([1, 0]), np.array([0, 1])]), "
-            h += "c_threshold = 1, "
-            h += "w_factor=None"
-            h = "(" + h + ")"
-            exec("index = " + Results[s_index][0] + h, None, globals())
-            index.__init__(fingerprints=fingerprints, c_threshold=c_threshold, w_factor=w_factor)
-            exec("result = index." + s_index, None, globals())
-            Results[s_index][1].append(result)
+    start = 0
+    for block in blocks:
+        for attribute, values in zip(attributes, block):
+            Results[attribute][1][start:start + len(values)] = values
+        start += len(block[0]) if block else 0
     return Results
 
 
+def _value_formats(methods):
+    """Format of the values of a row of the output, centered under each method name."""
+    return "".join("{:^%d.6f}     " % (len(method) + 1) for method in methods)
+
+
 def _indices_values(results, fp_total=2, n=2, methods=[]):
     """Generate output with the results of the comparisons.
 
@@ -152,125 +259,24 @@ def _indices_values(results, fp_total=2, n=2, methods=[]):
     methods : list
         List that contains the methods used to calculate the indices.
 
-    Returns
-    -------
-    s : str
-        String with the results of the comparisons of the given indices.
-    """
-    s = ""
-    for method in methods:
-        s += method + "      "
-    s += "\n"
-    for i in range(int(binom(fp_total, n))):
-        s += "{:<13d}".format(i + 1)
-        for method in methods:
-            l = len(method)
-            s += "{:^{}.6f}     ".format(results[method][1][i], l + 1)
-        s += "\n"
-    s += "\n             "
-    for method in methods:
-        s += method + "      "
-    return s
-
-
-def _max(results, methods=[]):
-    """Generate the maxima of the results of the comparisons.
-
-    Arguments
-    ---------
-    results : dict
-        Dictionary with the results of the comparisons.
-    methods : list
-        List that contains the methods used to calculate the indices.
-
-    Returns
-    -------
-    s : str
-        String with the maxima of the comparisons of the given indices.
-    """
-    s = ""
-    s += "\nMax          "
-    for method in methods:
-        max = np.amax(np.array(results[method][1]))
-        l = len(method)
-        s += "{:^{}.6f}     ".format(max, l + 1)
-    return s
-
-
-def _min(results, methods=[]):
-    """Generate the minima of the results of the comparisons.
-
-    Arguments
-    ---------
-    results : dict
-        Dictionary with the results of the comparisons.
-    methods : list
-        List that contains the methods used to calculate the indices.
-
-    Returns
-    -------
-    s : str
-        String with the minima of the comparisons of the given indices.
-    """
-    s = ""
-    s += "\nMin          "
-    for method in methods:
-        min = np.amin(np.array(results[method][1]))
-        l = len(method)
-        s += "{:^{}.6f}     ".format(min, l + 1)
-    return s
-
-
-def _abs_max(results, methods=[]):
-    """Generate the abs maxima of the results of the comparisons.
-
-    Arguments
-    ---------
-    results : dict
-        Dictionary with the results of the comparisons.
-    methods : list
-        List that contains the methods used to calculate the indices.
-
-    Returns
-    -------
-    s : str
-        String with the abs maxima of the comparisons of the given indices.
-    """
-    s = ""
-    s += "\nAbsMax       "
-    for method in methods:
-        absmax = np.amax(np.abs(np.array(results[method][1])))
-        l = len(method)
-        s += "{:^{}.6f}     ".format(absmax, l + 1)
-    return s
-
-
-def _abs_min(results, methods=[]):
-    """Generate the abs minima of the results of the comparisons.
-
-    Arguments
-    ---------
-    results : dict
-        Dictionary with the results of the comparisons.
-    methods : list
-        List that contains the methods used to calculate the indices.
-
-    Returns
-    -------
-    s : str
-        String with the abs minima of the comparisons of the given indices.
+    Yields
+    ------
+    line : str
+        Pieces of the output with the results of the comparisons of the given
+        indices, one per row, so that they can be written as they are formatted.
     """
-    s = ""
-    s += "\nAbsMin       "
-    for method in methods:
-        absmin = np.amin(np.abs(np.array(results[method][1])))
-        l = len(method)
-        s += "{:^{}.6f}     ".format(absmin, l + 1)
-    return s
+    header = "".join(method + "      " for method in methods)
+    # One format for the whole row, the columns are as wide as the method names
+    format_row = ("{:<13d}" + _value_formats(methods) + "\n").format
+    columns = [results[method][1] for method in methods]
+    yield header + "\n"
+    for row in zip(range(1, comb(fp_total, n) + 1), *columns):
+        yield format_row(*row)
+    yield "\n             " + header
 
 
-def _average(results, methods=[]):
-    """Generate the averages of the results of the comparisons.
+def _statistics(results, methods=[]):
+    """Generate the statistics of the results of the comparisons.
 
     Arguments
     ---------
@@ -282,38 +288,30 @@ def _average(results, methods=[]):
     Returns
     -------
     s : str
-        String with the averages of the comparisons of the given indices.
+        String with the maxima, abs maxima, minima, abs minima, averages
+        and abs averages of the comparisons of the given indices.
     """
-    s = ""
-    s += "\nAverage      "
-    for method in methods:
-        average = np.average(np.array(results[method][1]))
-        l = len(method)
-        s += "{:^{}.6f}     ".format(average, l + 1)
-    return s
-
-
-def _abs_average(results, methods=[]):
-    """Generate the abs averages of the results of the comparisons.
-
-    Arguments
-    ---------
-    results : dict
-        Dictionary with the results of the comparisons.
-    methods : list
-        List that contains the methods used to calculate the indices.
-
-    Returns
-    -------
-    String with the abs averages of the comparisons of the given indices.
+    labels = ("Max", "AbsMax", "Min", "AbsMin", "Average", "AbsAverage")
+    if not methods:
+        return "".join("\n{:<13}".format(label) for label in labels)
+    # One row per method, so that every statistic is a single reduction
+    values = np.stack([results[method][1] for method in methods]).astype(float, copy=False)
+    abs_values = np.abs(values)
+    statistics = (values.max(axis=1), abs_values.max(axis=1), values.min(axis=1),
+                  abs_values.min(axis=1), values.mean(axis=1), abs_values.mean(axis=1))
+    format_row = ("\n{:<13}" + _value_formats(methods)).format
+    return "".join(format_row(label, *statistic.tolist()) for label, statistic in zip(labels, statistics))
+
+
+def _write_output(results, file_name, header, fp_total=2, n=2, methods=[]):
+    """Write one output file with the results of the comparisons of the given methods.
+
+    The rows are streamed to the file instead of being joined in memory.
     """
-    s = ""
-    s += "\nAbsAverage   "
-    for method in methods:
-        absaverage = np.average(np.abs(np.array(results[method][1])))
-        l = len(method)
-        s += "{:^{}.6f}     ".format(absaverage, l + 1)
-    return s
+    with open(file_name, "w") as outfile:
+        outfile.write(header)
+        outfile.writelines(_indices_values(results=results, fp_total=fp_total, n=n, methods=methods))
+        outfile.write(_statistics(results=results, methods=methods))
 
 
 def indices_output(results, fp_total=2, fp_size=1, n=2):
@@ -335,8 +333,8 @@ def indices_output(results, fp_total=2, fp_size=1, n=2):
     s += "Fingerprint size (m)\n" + str(fp_size) + "\n\n"
     s += "Total number of fingerprints\n" + str(fp_total) + "\n\n"
     s += "Fingerprints compared simultaneously (n)\n" + str(n) + "\n\n"
-    s += "#            " 
-    
+    s += "#            "
+
     # Weighted indices.
     w = []
     # Unweighted indices.
@@ -346,43 +344,15 @@ def indices_output(results, fp_total=2, fp_size=1, n=2):
             w.append(s_index)
         else:
             no_w.append(s_index)
-    r_w = s
-    r_no_w = s
-
-    r_w += _indices_values(results=results, fp_total=fp_total, n=n, methods=w)
-    r_no_w += _indices_values(results=results, fp_total=fp_total, n=n, methods=no_w)
-    
-    r_w += _max(results=results, methods=w)
-    r_no_w += _max(results=results, methods=no_w)
-
-    r_w += _abs_max(results=results, methods=w)
-    r_no_w += _abs_max(results=results, methods=no_w)
-
-    r_w += _min(results=results, methods=w)
-    r_no_w += _min(results=results, methods=no_w)
-
-    r_w += _abs_min(results=results, methods=w)
-    r_no_w += _abs_min(results=results, methods=no_w)
-
-    r_w += _average(results=results, methods=w)
-    r_no_w += _average(results=results, methods=no_w)
-
-    r_w += _abs_average(results=results, methods=w)
-    r_no_w += _abs_average(results=results, methods=no_w)
-
-    with open("wFP"+str(fp_total)+"m"+str(fp_size)+"n"+str(n)+".sim", "w") as outfile:
-        outfile.write(r_w)
-
-    with open("nwFP"+str(fp_total)+"m"+str(fp_size)+"n"+str(n)+".sim", "w") as outfile:
-        outfile.write(r_no_w)
-
+    # The two files are independent, so they are written concurrently.
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [executor.submit(_write_output, results, weight + "FP" + str(fp_total) + "m" + str(fp_size)
+                                   + "n" + str(n) + ".sim", s, fp_total, n, methods)
+                   for weight, methods in (("w", w), ("nw", no_w))]
+        for future in futures:
+            future.result()
 
 if __name__ == "__main__":
-    # Imports the classes corresponding to the similarity indices.
-    for key in Indices:
-        s = "from indices." + _file_name_gen(key) + " import " + Indices[key][0]
-        exec(s)
-
     # Sample run with randomly generated fingerprints.
 
     # Coincidence threshold.
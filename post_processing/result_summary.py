@@ -1,4 +1,5 @@
 import glob
+import numpy as np
 from matplotlib import pyplot as plt
 from srd import header_modifier, extract_name_data
 
@@ -44,6 +45,7 @@ def process_stat_content(content):
     Returns
     -------
     max_data, abs_max_data, min_data, abs_min_data, average_data, abs_average_data
+    Float arrays with one value per index.
     max_data: maximum value of the index.
     abs_max_data: maximum absolute value of the index.
     min_data: minimum value of the index.
@@ -51,12 +53,9 @@ def process_stat_content(content):
     average_data: average value of the index.
     abs_average_data: average of the absolute values of the index.
     """
-    max_data = content[0].strip().split()[1:]
-    abs_max_data = content[1].strip().split()[1:]
-    min_data = content[2].strip().split()[1:]
-    abs_min_data = content[3].strip().split()[1:]
-    average_data = content[4].strip().split()[1:]
-    abs_average_data = content[5].strip().split()[1:]
+    # The first column of each line is the name of the statistical measure.
+    max_data, abs_max_data, min_data, abs_min_data, average_data, abs_average_data = \
+        (np.array(line.split(None, 1)[1].split(), dtype=np.float64) for line in content[:6])
     return max_data, abs_max_data, min_data, abs_min_data, average_data, abs_average_data
 
 
@@ -105,8 +104,8 @@ def gen_output_file(new_headers, stat_dict, n_values, name):
     for n in n_values:
         s += "n{:<4}".format(n)
         for header in new_headers:
-            s += "{:>10}  {:>10}      ".format(stat_dict[header]["w"][n],
-                                               stat_dict[header]["nw"][n])
+            s += "{:>10.6f}  {:>10.6f}      ".format(stat_dict[header]["w"][n],
+                                                     stat_dict[header]["nw"][n])
         s += "\n"
     with open(name, "w") as outfile:
         outfile.write(s)
@@ -134,7 +133,6 @@ def process_sim_files():
     average = {}
     abs_average = {}
     dict_list = [max, min, abs_max, abs_min, average, abs_average]
-    n_values = []
 
     headers, _ = read_stat_data(file_list[0])
     new_headers = header_modifier(headers)
@@ -144,34 +142,34 @@ def process_sim_files():
         for dict in dict_list:
             dict[header] = {"w": {}, "nw": {}}
 
+    # Every file is read once: (weight_info, n, content) of each file.
+    sim_data = []
     for name in file_list:
         weight_info, fp_total, m, n = extract_name_data(name)
-        if int(n) not in n_values:
-            n_values.append(int(n))
+        _, content = read_stat_data(name)
+        sim_data.append((weight_info, int(n), content))
 
-    n_values = sorted(n_values)
+    n_values = sorted({n for weight_info, n, content in sim_data})
 
-    for name in file_list:
-        weight_info, fp_total, m, n = extract_name_data(name)
-        _, content = read_stat_data(name)
+    for weight_info, n, content in sim_data:
         max_data, abs_max_data, min_data, abs_min_data, average_data, abs_average_data = \
             process_stat_content(content)
         for i, data in enumerate(max_data, start=1):
-            max[ind_order[i]][weight_info][int(n)] = data
+            max[ind_order[i]][weight_info][n] = data
         for i, data in enumerate(abs_max_data, start=1):
-            abs_max[ind_order[i]][weight_info][int(n)] = data
+            abs_max[ind_order[i]][weight_info][n] = data
         for i, data in enumerate(min_data, start=1):
-            min[ind_order[i]][weight_info][int(n)] = data
+            min[ind_order[i]][weight_info][n] = data
         for i, data in enumerate(abs_min_data, start=1):
-            abs_min[ind_order[i]][weight_info][int(n)] = data
+            abs_min[ind_order[i]][weight_info][n] = data
         for i, data in enumerate(average_data, start=1):
-            average[ind_order[i]][weight_info][int(n)] = data
+            average[ind_order[i]][weight_info][n] = data
         for i, data in enumerate(abs_average_data, start=1):
-            abs_average[ind_order[i]][weight_info][int(n)] = data
+            abs_average[ind_order[i]][weight_info][n] = data
     return n_values, max, abs_max, min, abs_min, average, abs_average
 
 
-def plot_index(index_stat_dict, n_values, name):
+def plot_index(index_stat_dict, n_values, name, ax=None):
     """Generate the plot for the given statistical measure for a similarity index.
 
     Arguments
@@ -182,25 +180,32 @@ def plot_index(index_stat_dict, n_values, name):
         List with the studied values of n (number of fingerprints compared simultaneously).
     name : str
         Name of the output file.
+    ax : matplotlib.axes.Axes, optional
+        Axes to draw on, which is cleared first. If not given, a new figure
+        is created with the 'seaborn-poster' style.
 
     Generate the .png file plotting the given statistical measure for a given index
     with respect to the different values of n, for the weighted and unweighted cases.
     """
+    if ax is None:
+        plt.style.use('seaborn-poster')
+        _, ax = plt.subplots()
+    else:
+        ax.cla()
     w_data = []
     nw_data = []
     for i in sorted(index_stat_dict["w"]):
-        w_data.append(float(index_stat_dict["w"][i]))
-        nw_data.append(float(index_stat_dict["nw"][i]))
-    plt.style.use('seaborn-poster')
-    plt.plot(n_values, w_data, label="w")
-    plt.plot(n_values, nw_data, label="nw")
-    plt.xlabel("n_values")
-    plt.ylabel("values")
-    plt.xticks(n_values)
-    plt.title("{}".format(name))
-    plt.legend()
-    plt.tight_layout()
-    plt.savefig("{}.png".format(name))
+        w_data.append(index_stat_dict["w"][i])
+        nw_data.append(index_stat_dict["nw"][i])
+    ax.plot(n_values, w_data, label="w")
+    ax.plot(n_values, nw_data, label="nw")
+    ax.set_xlabel("n_values")
+    ax.set_ylabel("values")
+    ax.set_xticks(n_values)
+    ax.set_title("{}".format(name))
+    ax.legend()
+    ax.figure.tight_layout()
+    ax.figure.savefig("{}.png".format(name))
 
 
 def plot_dict(full_stat_dict, n_values, name):
@@ -218,9 +223,12 @@ def plot_dict(full_stat_dict, n_values, name):
     Generate the .png files plotting the given statistical measure for all the indices
     with respect to the different values of n, for the weighted and unweighted cases.
     """
+    # The style and the figure are set up once and the axes are reused for every index.
+    plt.style.use('seaborn-poster')
+    fig, ax = plt.subplots()
     for s_index in full_stat_dict:
-        plt.close()
-        plot_index(full_stat_dict[s_index], n_values, name=s_index + name)
+        plot_index(full_stat_dict[s_index], n_values, name=s_index + name, ax=ax)
+    plt.close(fig)
 
 
 if __name__ == "__main__":
@@ -1,6 +1,8 @@
 import numpy as np
 import random
-from scipy.stats import rankdata
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+from itertools import chain
 
 
 def read_data(sim_file):
@@ -17,15 +19,19 @@ def read_data(sim_file):
     headers: similarity indices.
     content: results of the comparisons.
     """
+    # The results are the rows between the "#" line of the headers and the
+    # next blank line, so only those rows are kept while the file is read.
+    headers = None
+    content = []
     with open(sim_file, "r") as infile:
-        lines = infile.readlines()
-    for i in range(len(lines)):
-        if "#" in lines[i]:
-            start = i + 1
-        elif len(lines[i].strip()) == 0:
-            end = i - 1
-    headers = lines[start - 1].strip().split()[1:]
-    content = lines[start:end + 1]
+        for line in infile:
+            if headers is None:
+                if "#" in line:
+                    headers = line.strip().split()[1:]
+            elif line.strip():
+                content.append(line)
+            else:
+                break
     return headers, content
 
 
@@ -37,15 +43,29 @@ def header_modifier(headers):
     headers : list
         List of strings with the original headers as they appear in the .sim file.
     """
-    new_headers = []
-    for header in headers:
-        index, s, d = header.split("_")
-        if "1" in s:
-            s = "1"
-        else:
-            s = "0"
-        new_headers.append(index + "_" + s)
-    return new_headers
+    # index_sim_dis -> index_1 for the 1-similarity variants, index_0 otherwise.
+    return [index + ("_1" if "1" in s else "_0") for index, s, d in (header.split("_") for header in headers)]
+
+
+def _parse_content(content, ignore=[]):
+    """Parse the results of the comparisons into a matrix.
+
+    Arguments
+    ---------
+    content : list
+        List with the bulk of the results of the comparisons from the .sim file.
+    ignore : list
+        List of integers. Indices of the rows in content that will be skipped.
+
+    Returns
+    -------
+    values : np.ndarray
+        Array of shape (number of rows kept, number of indices) with the results
+        of the comparisons, without the column of row numbers.
+    """
+    ignore = set(ignore)
+    rows = [line for i, line in enumerate(content) if i not in ignore]
+    return np.loadtxt(rows, ndmin=2)[:, 1:]
 
 
 def get_total_data(headers, content, ignore=[]):
@@ -68,19 +88,8 @@ def get_total_data(headers, content, ignore=[]):
         Dictionary where the keys are the similarity indices
         and the values are the results of the comparisons.
     """
-    data = {}
-    for header in headers:
-        data[header] = []
-    for i in range(len(content)):
-        if i in ignore:
-            pass
-        else:
-            comparisons = content[i].strip().split()[1:]
-            for j in range(len(headers)):
-                data[headers[j]].append(float(comparisons[j]))
-    for header in headers:
-        data[header] = np.array(data[header])
-    return data
+    values = _parse_content(content, ignore)
+    return dict(zip(headers, values.T.copy()))
 
 
 def gen_ref(content, ignore=[]):
@@ -100,17 +109,75 @@ def gen_ref(content, ignore=[]):
     np.array
         Reference values for the SRD analysis.
     """
-    ref = []
-    for i in range(len(content)):
-        if i in ignore:
-            pass
-        else:
-            comparisons = content[i].strip().split()[1:]
-            value = 0
-            for j in range(len(comparisons)):
-                value += (float(comparisons[j]))
-            ref.append(value/len(comparisons))
-    return np.array(ref)
+    return _parse_content(content, ignore).mean(axis=1)
+
+
+# Rows with at least this many values are ranked from the sizes of their ties
+# (see _tie_count_ranks), which is faster than sorting the whole matrix at once
+# for long rows, above all when there are many ties.
+TIE_COUNT_MIN_SIZE = 2048
+
+
+def _tie_count_ranks(values):
+    """Rank the values along the last axis from the sizes of the ties (see _average_ranks).
+
+    np.unique gives the distinct values of a row in increasing order and how many
+    times each one appears. A tie of c values that ends at the sorted position e
+    (counted from 1) gets the rank e - (c - 1)/2. The NaNs, left out of np.unique,
+    are one tie after all the numbers.
+    """
+    n = values.shape[-1]
+    ranks = np.empty(values.shape)
+    for row, row_ranks in zip(values.reshape(-1, n), ranks.reshape(-1, n)):
+        nan_mask = np.isnan(row)
+        unique, inverse, counts = np.unique(row[~nan_mask], return_inverse=True, return_counts=True)
+        row_ranks[~nan_mask] = (np.cumsum(counts) - (counts - 1)/2)[inverse.ravel()]
+        n_numbers = n - np.count_nonzero(nan_mask)
+        row_ranks[nan_mask] = n_numbers + (n - n_numbers + 1)/2
+    return ranks
+
+
+def _average_ranks(values):
+    """Rank the values along the last axis, with the average rank for ties.
+
+    Arguments
+    ---------
+    values : np.ndarray
+        Array whose rows (or elements, if it is 1-D) will be ranked.
+
+    Returns
+    -------
+    ranks : np.ndarray
+        Float array with the ranks, from 1, of the values along the last axis.
+
+    Notes
+    -----
+    The tied values are contiguous after sorting. A tie occupying the sorted
+    positions s, ..., e gets the rank (s + e)/2 + 1, found from running
+    maxima and minima of the positions where the ties start and end.
+    This is the 'average' method of scipy.stats.rankdata, except for NaN:
+    all the NaNs of a row are one tie, ranked after all the numbers.
+    Rows of at least TIE_COUNT_MIN_SIZE values are ranked with _tie_count_ranks.
+    """
+    n = values.shape[-1]
+    if n >= TIE_COUNT_MIN_SIZE:
+        return _tie_count_ranks(values)
+    # The order within a tie does not matter, so the fastest (unstable) sort is used.
+    order = np.argsort(values, axis=-1, kind="quicksort")
+    sorted_values = np.take_along_axis(values, order, axis=-1)
+    positions = np.arange(n)
+    new_value = np.ones(values.shape, dtype=bool)
+    # NaN != NaN, so consecutive NaNs (sorted at the end) are explicitly kept in one tie
+    sorted_nan = np.isnan(sorted_values)
+    new_value[..., 1:] = ((sorted_values[..., 1:] != sorted_values[..., :-1])
+                          & ~(sorted_nan[..., 1:] & sorted_nan[..., :-1]))
+    last_value = np.ones(values.shape, dtype=bool)
+    last_value[..., :-1] = new_value[..., 1:]
+    starts = np.maximum.accumulate(np.where(new_value, positions, 0), axis=-1)
+    ends = np.minimum.accumulate(np.where(last_value, positions, n - 1)[..., ::-1], axis=-1)[..., ::-1]
+    ranks = np.empty(values.shape)
+    np.put_along_axis(ranks, order, (starts + ends)/2 + 1, axis=-1)
+    return ranks
 
 
 def _rank_array(array):
@@ -131,25 +198,10 @@ def _rank_array(array):
     1- Elements are ranked in increasing order (from smallest to biggest).
     2- The rank of elements with the same value is the average of the ranks.
     Example:
-    _rank_array([0.1, 0.4, 0.2]) -> np.array([2, 3, 1])
-    _rank_array([0.6, 0.2, 0.2, 0.1]) -> np.array([4, 2.5, 2.5, 1])
+    _rank_array([0.1, 0.4, 0.2]) -> np.array([1., 3., 2.])
+    _rank_array([0.6, 0.2, 0.2, 0.1]) -> np.array([4., 2.5, 2.5, 1.])
     """
-    order = array.argsort()
-    non_repeated_ranks = list(order.argsort() + 1)
-    repeated_ranks = list(rankdata(array, method="min"))
-    ranks = [0]*len(repeated_ranks)
-    for i in range(len(non_repeated_ranks)):
-        if repeated_ranks.count(repeated_ranks[i]) == 1:
-            ranks[i] = non_repeated_ranks[i]
-        else:
-            indices = [j for j, x in enumerate(repeated_ranks) if x == repeated_ranks[i]]
-            value = 0
-            for index in indices:
-                value += non_repeated_ranks[index]
-            value = value/len(indices)
-            for index in indices:
-                ranks[index] = value
-    return np.array(ranks)
+    return _average_ranks(np.asarray(array))
 
 
 def ranked_data(data):
@@ -165,10 +217,35 @@ def ranked_data(data):
     rk_data : dict
         Dictionary with the ranks for each index.
     """
-    rk_data = {}
-    for key in data:
-        rk_data[key] = _rank_array(data[key])
-    return rk_data
+    if not data:
+        return {}
+    # All the indices are ranked at once, one row each.
+    keys = list(data)
+    ranks = _average_ranks(np.array([data[key] for key in keys]))
+    return dict(zip(keys, ranks))
+
+
+def _values_srd(headers, values, ref):
+    """Calculate the SRD from the matrix with the results of the comparisons.
+
+    Arguments
+    ---------
+    headers : list
+        Similarity indices, in the order of the columns of values.
+    values : np.ndarray
+        Results of the comparisons, one row per comparison (see _parse_content).
+    ref : np.ndarray
+        Reference values for the SRD analysis, one per row of values.
+
+    Returns
+    -------
+    srd : dict
+        Dictionary with the SRD.
+    """
+    # The ranks of all the indices, one row each, are compared with the
+    # ranks of the reference in one broadcast operation.
+    ranks = _average_ranks(values.T)
+    return dict(zip(headers, np.abs(ranks - _rank_array(ref)).sum(axis=1)))
 
 
 def diff_rank(rk_data, ref_rank):
@@ -187,10 +264,12 @@ def diff_rank(rk_data, ref_rank):
         Dictionary with the absolute value of the difference of the ranks of the indices and the
         reference.
     """
-    d_rank = {}
-    for key in rk_data:
-        d_rank[key] = abs(rk_data[key] - ref_rank)
-    return d_rank
+    if not rk_data:
+        return {}
+    # One broadcast subtraction for all the indices, one row each.
+    keys = list(rk_data)
+    d_rank = np.abs(np.array([rk_data[key] for key in keys]) - ref_rank)
+    return dict(zip(keys, d_rank))
 
 
 def gen_srd(d_rank):
@@ -213,6 +292,7 @@ def gen_srd(d_rank):
     return srd
 
 
+@lru_cache(maxsize=None)
 def _srd_maximum(n_data):
     """Calculate the maximum possible SRD value.
 
@@ -226,7 +306,7 @@ def _srd_maximum(n_data):
     max_srd : int
         Maximum possible SRD value.
     """
-    k = (n_data - n_data % 2)/2
+    k = n_data // 2
     if n_data % 2 == 0:
         max_srd = 2 * k ** 2
     else:
@@ -250,7 +330,24 @@ def scaling_srd(n_data, d_rank):
     srd_scaled : dict
         Dictionary with the scaled SRD values.
     """
-    srd = gen_srd(d_rank)
+    return scale_srd(n_data, gen_srd(d_rank))
+
+
+def scale_srd(n_data, srd):
+    """Scale the SRD values normalized with respect to the maximum possible value.
+
+    Arguments
+    ---------
+    n_data : int
+        Number of comparisons.
+    srd : dict
+        Dictionary with the SRD.
+
+    Returns
+    -------
+    srd_scaled : dict
+        Dictionary with the scaled SRD values.
+    """
     max_srd = _srd_maximum(n_data)
     srd_scaled = {}
     for key in srd:
@@ -258,7 +355,37 @@ def scaling_srd(n_data, d_rank):
     return srd_scaled
 
 
-def ranking_data_str(rk_data, d_rank, ref, ref_rank):
+def _ranking_data_lines(rk_data, d_rank, ref, ref_rank, sorted_headers=None):
+    """Generate the (verbose) exposition of the SRD analysis piece by piece.
+
+    Same arguments as ranking_data_str.
+
+    Yields
+    ------
+    line : str
+        The header of the table and then its rows, so that they can be written
+        as they are formatted.
+    """
+    indices = sorted(rk_data) if sorted_headers is None else sorted_headers
+
+    yield ("No         " + "".join("{:^{}}  ".format(index, 23) for index in indices)
+           + "     Reference\n            " + len(indices) * "Ranking        Diff      "
+           + "Reference    Ranking\n")
+
+    # One format for the whole row: number, (ranking, diff) of every index,
+    # reference and its ranking.
+    format_row = ("{:<13d}" + len(indices) * "{:^7.1f}     {:^8.1f}     "
+                  + "{:^5.3f}        {:^5.3f}     \n").format
+    columns = []
+    for index in indices:
+        columns += [rk_data[index], d_rank[index]]
+    columns += [ref, ref_rank]
+    rows = zip(range(1, len(ref) + 1), *(np.asarray(column).tolist() for column in columns))
+    for row in rows:
+        yield format_row(*row)
+
+
+def ranking_data_str(rk_data, d_rank, ref, ref_rank, sorted_headers=None):
     """Generate string containing a (verbose) exposition of the SRD analysis.
 
     Arguments
@@ -272,92 +399,67 @@ def ranking_data_str(rk_data, d_rank, ref, ref_rank):
         Reference values for the SRD analysis.
     ref_rank: dict
         Dictionary with the ranks of the reference.
+    sorted_headers : {None, list}
+        Similarity indices in the order of the output. Default is None
+        (the sorted keys of rk_data).
 
     Returns
     -------
     s : str
         String containing a verbose exposition of the SRD analysis.
     """
-    s = "No         " 
-    
-    indices = []
-    for key in sorted(rk_data):
-        indices.append(key)
-    
-    for index in indices:
-        s += "{:^{}}  ".format(index, 23)
-    s += "     Reference\n            "
-    for index in range(len(indices)):
-        s += "Ranking        Diff      "
-    s += "Reference    Ranking"
-    s += "\n"
-    
-    for i in range(len(ref)):
-        s += "{:<13d}".format(i+1)
-        for index in indices:
-            s += "{:^{}.1f}     ".format(rk_data[index][i], 7)
-            s += "{:^{}.1f}     ".format(d_rank[index][i], 8)
-        s += "{:^{}.3f}        ".format(ref[i], 5)
-        s += "{:^{}.3f}     ".format(ref_rank[i], 5)
-        s += "\n"
-    return s
+    return "".join(_ranking_data_lines(rk_data, d_rank, ref, ref_rank, sorted_headers))
 
 
-def srd_str(n_data, d_rank, srd):
+def srd_str(name, n_data, srd, sorted_headers=None):
     """Generate string containing a (resumed) version of the SRD analysis.
 
     Arguments
     ---------
+    name : str
+        Name of the .sim file, whose stem labels the results.
     n_data : int
         Number of comparisons.
-    d_rank : dict
-        Dictionary with the absolute value of the difference of the ranks of the indices and the
-        reference.
     srd : dict
         Dictionary with the SRD.
+    sorted_headers : {None, list}
+        Similarity indices in the order of the output. Default is None
+        (the sorted keys of srd).
 
     Returns
     -------
     s : str
         String containing a resumed version of the SRD analysis.
     """
-    
-    indices = []
-    for key in sorted(d_rank):
-        indices.append(key)
-    
-    s = "{:12}".format(name.split(".")[0])
-    for index in indices:
-        s += "{:^{}}  ".format(index, 23)
-       
-    s += "\nSRD        "
-    for index in indices:
-        srd_value = srd[index]
-        l = len(index)
-        s += "{:^{}}  ".format(srd_value, 23)
-    srd_scaled = scaling_srd(n_data, d_rank)
-    s += "\nSRDnorm    "
-    for index in indices:
-        srd_scaled_value = srd_scaled[index]
-        l = len(index)
-        s += "{:^{}.3f}  ".format(srd_scaled_value, 23)
-    return s
+    indices = sorted(srd) if sorted_headers is None else sorted_headers
 
+    parts = ["{:12}".format(name.split(".")[0])]
+    parts.extend("{:^{}}  ".format(index, 23) for index in indices)
+    parts.append("\nSRD        ")
+    # The ranks are averages, so the SRD values are multiples of 0.5
+    parts.extend("{:^{}.1f}  ".format(srd[index], 23) for index in indices)
+    srd_scaled = scale_srd(n_data, srd)
+    parts.append("\nSRDnorm    ")
+    parts.extend("{:^{}.3f}  ".format(srd_scaled[index], 23) for index in indices)
+    return "".join(parts)
 
-def cv_individual_str(n_data, d_rank, cv_type, i):
+
+def cv_individual_str(n_data, srd, cv_type, i, sorted_headers=None):
     """Generate a str with the results of a single CV study.
 
     Arguments
     ---------
     n_data : int
         Number of comparisons.
-    d_rank : dict
-        Dictionary with the absolute value of the difference of the ranks of the indices and the
-        reference.
+    srd : dict
+        Dictionary with the SRD.
     cv_type : str
         Type of CV performed: 'sequential' or 'random'.
     i : int
         Number of the CV analysis.
+    sorted_headers : {None, list}
+        Similarity indices in the order of the output. Default is None
+        (the sorted keys of srd).
 
     Raises
     ------
@@ -371,29 +473,22 @@ def cv_individual_str(n_data, d_rank, cv_type, i):
     """
     if cv_type not in ["random", "sequential"]:
         raise TypeError("cv_type can only be one of 'sequential' or 'random'.")
-    s = ""
     if cv_type == "sequential":
         s_help = "Gr{}_A".format(i+1)
     elif cv_type == "random":
         s_help = "Gr{}_B".format(i+1)
     else:
         raise TypeError("cv_type can only be one of 'sequential' or 'random'.")
-    s += "{:<11}".format(s_help)
-    
-    indices = []
-    for key in sorted(d_rank):
-        indices.append(key)
-       
-    srd_scaled = scaling_srd(n_data, d_rank)
-    for index in indices:
-        srd_scaled_value = srd_scaled[index]
-        l = len(index)
-        s += "{:^{}.3f}  ".format(srd_scaled_value, 23)
-    s += "\n"
-    return s
+    indices = sorted(srd) if sorted_headers is None else sorted_headers
 
+    srd_scaled = scale_srd(n_data, srd)
+    parts = ["{:<11}".format(s_help)]
+    parts.extend("{:^{}.3f}  ".format(srd_scaled[index], 23) for index in indices)
+    parts.append("\n")
+    return "".join(parts)
 
-def gen_cross_indices(n_data, fraction=5, cv_type="random", repetitions=7):
+
+def gen_cross_indices(n_data, fraction=5, cv_type="random", repetitions=7, seed=None):
     """Generate the indices of the rows that will be used as test set in the CV analysis.
 
     Arguments
@@ -406,6 +501,8 @@ def gen_cross_indices(n_data, fraction=5, cv_type="random", repetitions=7):
         Type of CV performed: 'sequential' or 'random'.
     repetitions : int
         Number of times that a random CV will be performed.
+    seed : {None, int}
+        Seed of the random selection, for reproducible random CV results.
 
     Raises
     ------
@@ -423,22 +520,46 @@ def gen_cross_indices(n_data, fraction=5, cv_type="random", repetitions=7):
     ignore_size = n_data//fraction
     c_indices = []
     if cv_type == "random":
+        # without a seed the global random state is used, so random.seed() still applies
+        rng = random if seed is None else random.Random(seed)
         for i in range(repetitions):
-            c_inds = []
-            while len(c_inds) < ignore_size:
-                index = random.randint(0, n_data - 1)
-                if index in c_inds:
-                    pass
-                else:
-                    c_inds.append(index)
-            c_indices.append(c_inds)
+            c_indices.append(rng.sample(range(n_data), ignore_size))
     elif cv_type == "sequential":
         for i in range(fraction):
             c_indices.append(list(range(n_data)[i * ignore_size:(i + 1) * ignore_size]))
     return c_indices
 
 
-def cv_total_str(headers, content, n_data, fraction=5, cv_type="random", repetitions=7):
+def _folds_srd(c_indices, headers, values, ref):
+    """Calculate the SRD of a block of CV studies.
+
+    Arguments
+    ---------
+    c_indices : list
+        Indices of the rows left out (used as test set) in each CV study.
+    headers : list
+        Similarity indices, in the order of the columns of values.
+    values : np.ndarray
+        Results of all the comparisons (see _parse_content).
+    ref : np.ndarray
+        Reference values of all the comparisons.
+
+    Returns
+    -------
+    folds : list
+        (number of comparisons kept, SRD dict) of every CV study.
+    """
+    folds = []
+    for ignore in c_indices:
+        keep = np.ones(len(values), dtype=bool)
+        keep[ignore] = False
+        fold_ref = ref[keep]
+        folds.append((len(fold_ref), _values_srd(headers, values[keep], fold_ref)))
+    return folds
+
+
+def cv_total_str(headers, content, n_data, fraction=5, cv_type="random", repetitions=7, seed=None,
+                 sorted_headers=None, values=None, n_jobs=1):
     """Generate string with the results of the CV studies.
 
     Arguments
@@ -455,6 +576,17 @@ def cv_total_str(headers, content, n_data, fraction=5, cv_type="random", repetit
         Type of CV performed: 'sequential' or 'random'.
     repetitions : {int, None}
         Number of times that a random CV will be performed.
+    seed : {None, int}
+        Seed of the random CV.
+    sorted_headers : {None, list}
+        Similarity indices in the order of the output. Default is None
+        (the sorted headers).
+    values : {None, np.ndarray}
+        Results of the comparisons already parsed from content (see _parse_content).
+        Default is None (content is parsed here).
+    n_jobs : int
+        Number of processes that share the CV studies.
+        The results keep the order of the CV studies.
 
     Raises
     ------
@@ -468,21 +600,24 @@ def cv_total_str(headers, content, n_data, fraction=5, cv_type="random", repetit
     """
     if cv_type not in ["random", "sequential"]:
         raise TypeError("cv_type can only be one of 'sequential' or 'random'.")
-    indices = []
-    for header in headers:
-        indices.append(header)
-    
-    s = ""
-    c_indices = gen_cross_indices(n_data, fraction, cv_type, repetitions)
-    for i, ignore in enumerate(c_indices):
-        data = get_total_data(headers, content, ignore)
-        ref = gen_ref(content, ignore)
-        n_data = len(ref)
-        ref_rank = _rank_array(ref)
-        rk_data = ranked_data(data)
-        d_rank = diff_rank(rk_data, ref_rank)
-        s += cv_individual_str(n_data, d_rank, cv_type, i)
-    return s
+    if sorted_headers is None:
+        sorted_headers = sorted(headers)
+    if values is None:
+        values = _parse_content(content)
+    # The results are parsed once, each CV only leaves out the rows of its test set.
+    ref = values.mean(axis=1)
+    c_indices = gen_cross_indices(n_data, fraction, cv_type, repetitions, seed)
+    folds_srd = partial(_folds_srd, headers=headers, values=values, ref=ref)
+    if n_jobs == 1:
+        folds = folds_srd(c_indices)
+    else:
+        # a few blocks per process balance the load, the map keeps their order
+        block_size = max(1, -(-len(c_indices) // (4 * n_jobs)))
+        blocks = [c_indices[start:start + block_size] for start in range(0, len(c_indices), block_size)]
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            folds = list(chain.from_iterable(executor.map(folds_srd, blocks)))
+    return "".join(cv_individual_str(n_data, srd, cv_type, i, sorted_headers)
+                   for i, (n_data, srd) in enumerate(folds))
 
 
 def output_header(fp_total, m, n):
@@ -537,7 +672,7 @@ def extract_name_data(filename):
     return weight_info, fp_total, m, n
 
 
-def process_data(sim_file, fraction=7, repetitions=50):
+def process_data(sim_file, fraction=7, repetitions=50, seed=None, verbose=False, n_jobs=1):
     """Perform SRD analysis.
 
     Arguments
@@ -548,31 +683,45 @@ def process_data(sim_file, fraction=7, repetitions=50):
         Fraction of the data that will be ignored (used as test set).
     repetitions : int
         Number of times that a random CV will be performed.
+    seed : {None, int}
+        Seed of the random CV, for reproducible results.
+    verbose : bool
+        If True, the rankings of every comparison (see ranking_data_str) are added
+        to the output. They are only calculated in that case.
+    n_jobs : int
+        Number of processes that share the random CV studies.
 
     Creates the files with the results of the SRD analysis.
     """
-    ignore = []
     headers, content = read_data(sim_file)
     headers = header_modifier(headers)
-    data = get_total_data(headers, content, ignore)
-    ref = gen_ref(content, ignore)
+    # Order of the indices in all the output
+    sorted_headers = sorted(headers)
+    values = _parse_content(content)
+    ref = values.mean(axis=1)
     n_data = len(ref)
-    ref_rank = _rank_array(ref)
-    rk_data = ranked_data(data)
-    d_rank = diff_rank(rk_data, ref_rank)
-    srd = gen_srd(d_rank)
-    srd_results = srd_str(n_data, d_rank, srd)
+    srd = _values_srd(headers, values, ref)
+    srd_results = srd_str(sim_file, n_data, srd, sorted_headers)
 
     cv_results_seq = cv_total_str(headers, content, n_data, fraction,
-                                  cv_type="sequential", repetitions=None)
+                                  cv_type="sequential", repetitions=None, sorted_headers=sorted_headers,
+                                  values=values)
     cv_results_rand = cv_total_str(headers, content, n_data, fraction,
-                                   cv_type="random", repetitions=repetitions)
+                                   cv_type="random", repetitions=repetitions, seed=seed,
+                                   sorted_headers=sorted_headers, values=values, n_jobs=n_jobs)
 
-    s = srd_results + "\n" + cv_results_seq + cv_results_rand
-    
+    # The results are written as they are generated, the rows of the verbose
+    # table are streamed instead of being joined in memory.
     name = "SRD" + sim_file.split(".")[0] + "CV" + str(fraction) + ".txt"
-    with open(name, "w") as outfile:
-        outfile.write(s)
+    with open(name, "w", buffering=1 << 20) as outfile:
+        outfile.write(srd_results + "\n" + cv_results_seq + cv_results_rand)
+        if verbose:
+            weight_info, fp_total, m, n = extract_name_data(sim_file)
+            rk_data = dict(zip(headers, _average_ranks(values.T)))
+            ref_rank = _rank_array(ref)
+            d_rank = diff_rank(rk_data, ref_rank)
+            outfile.write("\n" + output_header(fp_total, m, n))
+            outfile.writelines(_ranking_data_lines(rk_data, d_rank, ref, ref_rank, sorted_headers))
 
 
 if __name__ == "__main__":